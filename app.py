@@ -4,160 +4,477 @@
 import os
 import re
 import time
-import json
-import socket
-import requests
-import yt_dlp
-import whisper
-from pytube import YouTube
+import threading
 from datetime import datetime
 import streamlit as st
-from openai import OpenAI
+# whisper/torch, yt_dlp, pytube and openai are imported on first use of the stage that
+# needs them, so browsing the page or the history never pays for loading them
+import model_registry
+import transcript_cache
+import summarizer
+import workspace
+import jobs
+import history_store
+import summary_cache
+import metrics
+import downloader
+import llm_client
+import compaction
 
 # =============================
 # CONFIGURATION
 # =============================
 
 OPENAI_API_KEY = " "  # Replace with your valid OpenAI API key
-client = OpenAI(api_key=OPENAI_API_KEY)
+client = None  # assign an OpenAI-compatible client here to override the default one
 HISTORY_FILE = "history.json"
+HISTORY_PAGE_SIZE = 10  # sidebar entries per "Load more"
+SUMMARY_TYPES = ["Paragraph", "Bullet Points", "Conversational"]
+LANGUAGES = ["English", "Kannada", "Hindi","Tamil","Telugu","Malayalam","Bengali","French","Arabic","Korean"]
+WHISPER_MODEL_SIZE = "small"
+# "pcm16k": transcode once to 16 kHz mono WAV (what Whisper decodes to anyway)
+# "native": keep the downloaded Opus/M4A stream and let Whisper's ffmpeg decode it directly
+# "wav":    the original full-rate WAV at preferredquality 192
+AUDIO_INGEST_MODE = "pcm16k"
+WHISPER_LANGUAGE = None  # None lets Whisper detect the spoken language
+WHISPER_DECODE_OPTIONS = {}  # e.g. {"word_timestamps": True} also caches per-word timings
+WHISPER_PARALLEL_WORKERS = 0  # >1 splits long audio at pauses and transcribes chunks on a process pool
+ASR_ENGINE = "whisper"  # "whisper", "faster-whisper" (CTranslate2, int8 on CPU) or "whisper.cpp"
+ASR_COMPUTE_TYPE = None  # None: the engine's default (fp32/fp16 for whisper, int8 for faster-whisper on CPU)
+ASR_THREADS = 0  # 0: the engine's default
+ASR_BEAM_SIZE = None  # None: the engine's default
+# Where transcripts come from, in order of preference: "manual" (uploaded YouTube captions),
+# "auto" (YouTube's auto-generated captions) and "asr" (download + transcribe ourselves)
+TRANSCRIPT_SOURCES = ["manual", "auto", "asr"]
+ASR_RTF_ESTIMATE = 0.5  # decode seconds per audio second, until this process has measured its own
+# Cut silent intros/outros, shorten long pauses and normalize loudness before ASR;
+# timestamps are mapped back to the original video timeline
+AUDIO_PREPROCESS = True
 
 # =============================
 # HISTORY HANDLING
 # =============================
 
-def load_history():
+@st.cache_resource
+def import_legacy_history():
+    # One-time migration of the old whole-file JSON history into the indexed store
     if os.path.exists(HISTORY_FILE):
-        with open(HISTORY_FILE, "r", encoding="utf-8") as f:
-            return json.load(f)
-    return []
+        history_store.import_json(HISTORY_FILE)
+        os.replace(HISTORY_FILE, HISTORY_FILE + ".imported")
+    return True
+
+def load_history(offset=0, limit=10, **filters):
+    import_legacy_history()
+    return history_store.page(offset, limit, **filters)  # newest first
 
 def save_history(entry):
-    history = load_history()
-    history.insert(0, entry)  # newest first
-    with open(HISTORY_FILE, "w", encoding="utf-8") as f:
-        json.dump(history, f, ensure_ascii=False, indent=4)
-    return history
+    import_legacy_history()
+    history_store.append(entry)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def history_page(version, before_id, limit=HISTORY_PAGE_SIZE):
+    # The store's version is part of the key: any write, from any session, job or process,
+    # moves every reader onto new keys, and until then reruns never touch the database
+    return history_store.headers(before_id, limit)
+
+@st.cache_data(max_entries=256, show_spinner=False)
+def history_entry(entry_id):
+    # Entries are never edited and ids are never reused, so no version is needed here
+    return history_store.get(entry_id)
+
+def load_more_history():
+    st.session_state["history_pages"] = st.session_state.get("history_pages", 1) + 1
+
+def render_history_entry(item):
+    with st.expander(f"{item['timestamp']}", expanded=False):
+        st.markdown("**Video**")
+        st.caption(f"[{item['video_url'][:40]}...]({item['video_url']})")
+        st.markdown(f"**Language:** {item['language']}")
+        st.markdown(f"**Format:** {item['summary_type']}")
+        st.markdown("**Summary:**")
+        # Streamlit runs an expander's body whether or not it is open, so the full
+        # summary is only fetched once it is asked for
+        if item["truncated"] and st.checkbox("Show full summary", key=f"hist_full_{item['id']}"):
+            entry = history_entry(item["id"]) or {"summary": item["preview"]}
+            st.text_area("", entry["summary"], height=240, key=f"hist_{item['id']}", label_visibility="collapsed")
+        else:
+            st.caption(item["preview"] + ("..." if item["truncated"] else ""))
+
+def index_transcript(video_url, text, language=None):
+    history_store.index_transcript(
+        transcript_cache.extract_video_id(video_url), video_url, text, language,
+        datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+    )
+
+# =============================
+# OPENAI CLIENT
+# =============================
+
+_run_scope = threading.local()
+
+@st.cache_resource
+def _default_client():
+    # One connection pool and one RPM/TPM budget shared by every session and job
+    return llm_client.create_client(OPENAI_API_KEY)
+
+def begin_session_run():
+    """A rerun abandons the previous run's page, so its in-flight LLM requests are cancelled."""
+    previous = st.session_state.get("llm_cancel")
+    if previous is not None:
+        previous.set()
+    st.session_state["llm_cancel"] = _run_scope.cancel = threading.Event()
+
+def get_client():
+    base = client or _default_client()
+    cancel = getattr(_run_scope, "cancel", None)  # only set on the script thread, not in background jobs
+    if cancel is not None and isinstance(base, llm_client.RateLimitedClient):
+        return base.scoped(cancel=cancel)
+    return base
 
 # =============================
 # AUDIO DOWNLOAD (Robust)
 # =============================
 
-def download_audio(video_url, filename="audio.wav"):
+def find_audio_file(workdir="."):
+    if not os.path.isdir(workdir):
+        return None
+    candidates = sorted(
+        name for name in os.listdir(workdir)
+        if name.startswith("audio.") and not name.endswith((".part", ".ytdl", ".temp"))
+    )
+    if "audio.wav" in candidates:
+        return os.path.join(workdir, "audio.wav")
+    return os.path.join(workdir, candidates[0]) if candidates else None
+
+def download_audio(video_url, workdir=".", stats=None):
+    with metrics.timer("download_seconds") as labels:
+        audio_path = _download_audio(video_url, workdir, stats, labels)
+        labels["outcome"] = "ok" if audio_path else "failed"
+    return audio_path
+
+def _download_audio(video_url, workdir, stats, labels):
     st.info("Attempting audio download...")
-    video_url = video_url.split("?")[0]
-
-    ydl_opts = {
-        'format': 'bestaudio/best',
-        'outtmpl': 'audio',
-        'postprocessors': [{
-            'key': 'FFmpegExtractAudio',
-            'preferredcodec': 'wav',
-            'preferredquality': '192',
-        }],
-        'noplaylist': True,
-        'nocheckcertificate': True,
-        'retries': 5,
-        'socket_timeout': 60,
-        'quiet': True,
-    }
-
-    for attempt in range(3):
-        try:
-            with yt_dlp.YoutubeDL(ydl_opts) as ydl:
-                ydl.download([video_url])
-            st.success("Audio downloaded using yt_dlp!")
-            break
-        except (yt_dlp.utils.DownloadError, socket.timeout) as e:
-            st.warning(f"yt_dlp timeout (try {attempt+1}/3): {e}")
-            time.sleep(3)
-        except Exception as e:
-            st.warning(f"yt_dlp error (try {attempt+1}/3): {e}")
-            time.sleep(3)
-    else:
-        st.error("yt_dlp failed, switching to pytube...")
-        try:
-            yt = YouTube(video_url)
-            stream = yt.streams.filter(only_audio=True).first()
-            out_file = stream.download(filename="audio")
-            if not out_file.endswith(".wav"):
-                os.rename(out_file, filename)
-            st.success("Audio downloaded using pytube fallback!")
-        except Exception as e:
-            st.error(f"pytube also failed: {e}")
-            return None
-
-    if os.path.exists("audio.wav"):
-        return "audio.wav"
-    elif os.path.exists("audio.wav.wav"):
-        os.rename("audio.wav.wav", "audio.wav")
-        return "audio.wav"
-    else:
-        st.error("Audio file not found after download.")
+    stats = stats if stats is not None else {}
+    stats["ingest_mode"] = AUDIO_INGEST_MODE
+
+    try:
+        audio_path = downloader.download(
+            downloader.canonical_url(video_url), workdir, AUDIO_INGEST_MODE, stats,
+            max_bytes=workspace.WORKSPACE_QUOTA_BYTES,
+        )
+    except Exception as e:
+        st.error(f"Audio download failed (yt_dlp and pytube): {e}")
+        return None
+    labels["source"] = stats["source"]
+    st.success(f"Audio downloaded using {stats['source']}!")
+
+    if not workspace.within_quota(workdir):
+        os.remove(audio_path)
+        st.error("Audio file is larger than the workspace disk quota.")
         return None
+    stats["output_bytes"] = os.path.getsize(audio_path)
+    metrics.inc("download_bytes_total", stats.get("download_bytes", 0))
+    if "transcode_seconds" in stats:
+        metrics.observe("transcode_seconds", stats["transcode_seconds"], mode=AUDIO_INGEST_MODE)
+    st.caption(
+        f"Downloaded {stats.get('download_bytes', 0) / 1e6:.1f} MB in {stats.get('download_seconds', 0)}s, "
+        f"transcode {stats.get('transcode_seconds', 0)}s, "
+        f"{stats['output_bytes'] / 1e6:.1f} MB on disk ({AUDIO_INGEST_MODE})"
+    )
+    return audio_path
 
 # =============================
 # TRANSCRIBE AUDIO (Whisper)
 # =============================
 
-def transcribe_audio(audio_file="audio.wav"):
-    if not os.path.exists(audio_file):
+def asr_model_id():
+    # Plain "small" for the original whisper setup keeps existing cache entries valid
+    if ASR_ENGINE == "whisper" and not ASR_COMPUTE_TYPE:
+        return WHISPER_MODEL_SIZE
+    return f"{ASR_ENGINE}:{WHISPER_MODEL_SIZE}:{ASR_COMPUTE_TYPE or 'default'}"
+
+def asr_decode_options():
+    options = dict(WHISPER_DECODE_OPTIONS)
+    if ASR_BEAM_SIZE:
+        options["beam_size"] = ASR_BEAM_SIZE
+    return options
+
+def asr_cache_options(preprocessed=None):
+    """Decode options plus how the audio was prepared, for the transcript cache key."""
+    if preprocessed is None:
+        preprocessed = AUDIO_PREPROCESS
+    options = asr_decode_options()
+    if preprocessed:
+        options["preprocess"] = True
+    return options
+
+def asr_engine_options():
+    return {"engine": ASR_ENGINE, "dtype": ASR_COMPUTE_TYPE, "threads": ASR_THREADS or None}
+
+def get_cached_transcript(video_url):
+    if not video_url:
+        return None
+    for source in TRANSCRIPT_SOURCES:
+        if source == "asr":
+            cached = transcript_cache.get(video_url, asr_model_id(), WHISPER_LANGUAGE, asr_cache_options())
+            if not cached and AUDIO_PREPROCESS:
+                # Untrimmed (e.g. streamed) transcripts are as good; trimmed ones never stand in for them
+                cached = transcript_cache.get(video_url, asr_model_id(), WHISPER_LANGUAGE, asr_cache_options(False))
+        else:
+            cached = transcript_cache.get(video_url, f"captions:{source}", WHISPER_LANGUAGE)
+        if cached:
+            return cached
+    return None
+
+def acquire_captions(video_url, workdir=".", stats=None):
+    """Uses the video's YouTube captions as the transcript when TRANSCRIPT_SOURCES prefers
+    them to ASR. Returns the cached transcript entry, or None when ASR is needed."""
+    import captions
+
+    stats = stats if stats is not None else {}
+    sources = TRANSCRIPT_SOURCES[:TRANSCRIPT_SOURCES.index("asr")] if "asr" in TRANSCRIPT_SOURCES else TRANSCRIPT_SOURCES
+    found = None
+    if video_url and sources:
+        try:
+            with metrics.timer("caption_fetch_seconds") as labels:
+                found = captions.fetch(video_url, sources, WHISPER_LANGUAGE)
+                labels["source"] = found["source"] if found else "none"
+        except Exception as e:
+            st.warning(f"Could not fetch captions, falling back to transcription: {e}")
+    if not found:
+        stats["transcript_source"] = "asr"
+        metrics.inc("transcript_source_total", source="asr")
+        return None
+
+    duration = found["duration"] or found["segments"][-1]["end"]
+    asr_seconds = duration * (model_registry.observed_real_time_factor() or ASR_RTF_ESTIMATE)
+    stats.update({
+        "transcript_source": found["source"],
+        "caption_language": found["language"],
+        "caption_seconds": found["fetch_seconds"],
+        "time_saved_seconds": round(max(0.0, asr_seconds - found["fetch_seconds"]), 1),
+    })
+    metrics.inc("transcript_source_total", source=found["source"])
+    metrics.inc("asr_seconds_saved_total", stats["time_saved_seconds"])
+    entry = transcript_cache.put(
+        video_url, f"captions:{found['source']}", found["text"],
+        segments=found["segments"], language=WHISPER_LANGUAGE,
+    )
+    index_transcript(video_url, found["text"], found["language"])
+    write_transcript(found["text"], workdir)
+    return entry
+
+def write_transcript(text, workdir="."):
+    with open(os.path.join(workdir, "transcript.txt"), "w", encoding="utf-8") as f:
+        f.write(text)
+
+def read_transcript(workdir="."):
+    path = os.path.join(workdir, "transcript.txt")
+    if not os.path.exists(path):
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return f.read()
+
+def preprocess_audio(audio_file, stats=None):
+    """Decodes the file and trims non-speech. Returns (audio, offset_map)."""
+    import asr_engines
+    import audio_preprocess
+
+    audio, offsets, prep = audio_preprocess.preprocess(asr_engines.load_audio(audio_file))
+    if stats is not None:
+        stats.update({"removed_fraction": prep["removed_fraction"], "preprocess_seconds": prep["seconds"]})
+    metrics.observe("audio_removed_fraction", prep["removed_fraction"], buckets=metrics.RATIO_BUCKETS)
+    metrics.inc("asr_audio_seconds_trimmed_total", prep["original_seconds"] - prep["trimmed_seconds"])
+    if prep["removed_fraction"] > 0:
+        st.caption(
+            f"Skipping {prep['removed_fraction']:.0%} of the audio as silence "
+            f"({prep['original_seconds']:.0f}s → {prep['trimmed_seconds']:.0f}s)"
+        )
+    return audio, offsets
+
+def transcribe_audio(audio_file=None, video_url=None, workdir=".", stats=None):
+    cached = get_cached_transcript(video_url)
+    if cached:
+        st.info("Transcript found in cache, skipping transcription.")
+        if not history_store.has_transcript(transcript_cache.extract_video_id(video_url)):
+            index_transcript(video_url, cached["text"], cached.get("language"))  # e.g. a history.db started afresh
+        write_transcript(cached["text"], workdir)
+        return cached["text"]
+
+    audio_file = audio_file or find_audio_file(workdir)
+    if not audio_file or not os.path.exists(audio_file):
         st.error("Audio file not found. Please download first.")
         return ""
-    st.info("Loading Whisper model (small)...")
-    model = whisper.load_model("small")
-    st.info("Transcribing audio... please wait...")
-    result = model.transcribe(audio_file)
+    options = asr_decode_options()
+    if WHISPER_LANGUAGE:
+        options["language"] = WHISPER_LANGUAGE
+    audio, offsets = audio_file, None
+    if AUDIO_PREPROCESS:
+        audio, offsets = preprocess_audio(audio_file, stats)
+    if WHISPER_PARALLEL_WORKERS > 1:
+        import parallel_transcribe
+        st.info(f"Transcribing audio on {WHISPER_PARALLEL_WORKERS} workers... please wait...")
+        result = parallel_transcribe.transcribe_parallel(
+            audio, WHISPER_MODEL_SIZE, WHISPER_PARALLEL_WORKERS,
+            engine=ASR_ENGINE, compute_type=ASR_COMPUTE_TYPE, **options
+        )
+    else:
+        if not model_registry.is_loaded(WHISPER_MODEL_SIZE, dtype=ASR_COMPUTE_TYPE, engine=ASR_ENGINE):
+            st.info(f"Loading {ASR_ENGINE} model ({WHISPER_MODEL_SIZE})...")
+        st.info("Transcribing audio... please wait...")
+        result = model_registry.transcribe(audio, WHISPER_MODEL_SIZE, **asr_engine_options(), **options)
+    if offsets is not None:
+        result = offsets.remap(result)
     text = result["text"]
 
-    with open("transcript.txt", "w", encoding="utf-8") as f:
-        f.write(text)
+    if video_url:
+        transcript_cache.put(
+            video_url, asr_model_id(), text,
+            segments=result.get("segments"),
+            audio_file=audio_file,
+            language=WHISPER_LANGUAGE,
+            options=asr_cache_options(),
+        )
+        index_transcript(video_url, text, result.get("language"))
+    write_transcript(text, workdir)
+    return text
+
+def stream_download_and_transcribe(video_url, workdir=".", placeholder=None):
+    """Transcribes while downloading, rendering segments into placeholder as they arrive."""
+    import yt_dlp
+    import streaming_pipeline
+
+    options = asr_decode_options()
+    if WHISPER_LANGUAGE:
+        options["language"] = WHISPER_LANGUAGE
+    segments = []
+    try:
+        for segment in streaming_pipeline.stream_transcribe(video_url, model_size=WHISPER_MODEL_SIZE,
+                                                            **asr_engine_options(), **options):
+            segments.append(segment)
+            if placeholder is not None:
+                placeholder.text("".join(s["text"] for s in segments[-40:]).strip())
+    except streaming_pipeline.StreamError as e:
+        # A partial transcript must not be cached as the video's full transcript
+        st.error(f"The audio stream broke off before the end; nothing was saved. ({e})")
+        return ""
+    except (yt_dlp.utils.DownloadError, OSError) as e:
+        # Private/removed videos, bad URLs, no ffmpeg on PATH
+        st.error(f"Could not stream the audio: {e}")
+        return ""
+    text = "".join(s["text"] for s in segments)
+    if text:
+        transcript_cache.put(
+            video_url, asr_model_id(), text,
+            segments=segments,
+            language=WHISPER_LANGUAGE,
+            options=asr_cache_options(False),
+        )
+        index_transcript(video_url, text, WHISPER_LANGUAGE)
+        write_transcript(text, workdir)
     return text
 
 # =============================
 # OPENAI SUMMARIZATION + TRANSLATION
 # =============================
 
-def summarize_text_openai(text, summary_type="Paragraph", language="English"):
-    if not text.strip():
-        return "No transcript found."
-
-    if summary_type == "Paragraph":
-        prompt = f"Summarize this transcript into one short, clear paragraph in {language}:\n\n{text}"
-
-    elif summary_type == "Bullet Points":
-        prompt = f"""
-Summarize the following transcript into short, clear **numbered points** in {language}.
-Each point should capture one key idea or event on a new line.
-Do not repeat similar ideas.
-Output format:
-1. ...
-2. ...
-3. ...
-Transcript:
-{text}
-"""
+def summary_source_stream(text, summary_type, language, segments=None, report=None, origin=None):
+    # Switching languages only needs a translation of a summary we already have
+    other = summary_cache.find_other_language(
+        text, summary_type, summarizer.SUMMARY_MODEL, summarizer.PROMPT_VERSION
+    )
+    if other:
+        if origin is not None:
+            origin["translated_from"] = other[0]
+        return summarizer.translate_stream(get_client(), other[1], summary_type, language)
+    # Filler and loops never reach the model; a transcript a little over the format's budget
+    # loses its least informative sentences, while one past the map-reduce threshold is
+    # kept whole for the summarizer to chunk
+    source, stats = compaction.compact(text, segments, compaction.budget_for(summary_type))
+    if report is not None:
+        report.update(stats)
+    # Whatever is still too long is chunked and summarized map-reduce style
+    return summarizer.summarize_stream(get_client(), source, summary_type, language)
 
-    elif summary_type == "Conversational":
-        prompt = f"""
-Convert the following text into a natural back-and-forth dialogue between Speaker 1 and Speaker 2 in {language}.
-Each line should be in this format:
-Speaker 1: "..."
-Speaker 2: "..."
-Alternate naturally between them, only including ideas found in the text.
-
-Transcript:
-{text}
-"""
-    else:
-        prompt = text
+def cached_summary_stream(key, text, summary_type, language, segments=None, report=None):
+    leader, future = summary_cache.begin(key)
+    if not leader:
+        # Someone else is already generating this exact summary; share their result
+        try:
+            with metrics.timer("summary_queue_seconds", reason="coalesced"):
+                summary = future.result()
+        except llm_client.RequestCancelled:
+            # The session generating it went away; generate it here instead
+            yield from cached_summary_stream(key, text, summary_type, language, segments, report)
+            return
+        metrics.inc("summary_coalesced_total")
+        yield summary
+        return
+    summary, origin = "", {}
+    try:
+        for token in summary_source_stream(text, summary_type, language, segments, report, origin):
+            summary += token
+            yield token
+    except BaseException as e:
+        # GeneratorExit (the rerun abandoned this page) and Streamlit's stop/rerun signals
+        # are cancellations: followers take over instead of failing
+        summary_cache.fail(key, e if isinstance(e, Exception) else llm_client.RequestCancelled("summary cancelled"))
+        raise
+    summary_cache.finish(key, summary.strip(), origin.get("translated_from"))
 
-    response = client.chat.completions.create(
-        model="gpt-4o-mini",
-        messages=[{"role": "user", "content": prompt}],
-        temperature=0.7
+def summarize_text_openai(text, summary_type="Paragraph", language="English", segments=None, stream=False,
+                          report=None):
+    if not text.strip():
+        return iter(["No transcript found."]) if stream else "No transcript found."
+    key = summary_cache.make_key(
+        text, summary_type, language, summarizer.SUMMARY_MODEL, summarizer.PROMPT_VERSION
     )
-    return response.choices[0].message.content.strip()
+    cached = summary_cache.get(key)
+    metrics.inc("summary_cache_requests_total", hit=cached is not None)
+    if cached is not None:
+        return iter([cached]) if stream else cached
+    stream_tokens = cached_summary_stream(key, text, summary_type, language, segments, report)
+    return stream_tokens if stream else "".join(stream_tokens).strip()
+
+def summarize_batch(text, summary_types, languages, segments=None, report=None):
+    """Yields (summary_type, language, summary) as each combination completes."""
+    # One digest serves every format, so it gets the largest of their budgets
+    source, stats = compaction.compact(text, segments, max(compaction.budget_for(t) for t in summary_types))
+    if report is not None:
+        report.update(stats)
+    for summary_type, language, summary in summarizer.fan_out(
+        get_client(), source, summary_types, languages, report=report
+    ):
+        summary_cache.put(
+            summary_cache.make_key(text, summary_type, language, summarizer.SUMMARY_MODEL, summarizer.PROMPT_VERSION),
+            summary,
+        )
+        yield summary_type, language, summary
+
+def compaction_result(report):
+    keys = ("original_tokens", "compacted_tokens", "tokens_saved", "compression_ratio")
+    return {k: report[k] for k in keys if k in report}
+
+def describe_compaction(report):
+    if "tokens_saved" not in report:
+        return None
+    return (f"Transcript compacted {report['compression_ratio']}x: {report['original_tokens']:,} → "
+            f"{report['compacted_tokens']:,} tokens ({report['tokens_saved']:,} saved)")
+
+def friendly_llm_error(error):
+    if isinstance(error, llm_client.RequestCancelled):
+        return "The summary request was cancelled."
+    if isinstance(error, llm_client.DeadlineExceeded):
+        return "OpenAI is taking too long to respond right now. Please try again in a minute."
+    cause = error.__cause__
+    status = getattr(cause, "status_code", None)
+    if status == 401:
+        return "OpenAI rejected the API key. Check OPENAI_API_KEY in app.py."
+    if status == 429:
+        return "The OpenAI rate limit or quota is exhausted. Please try again later."
+    if status is not None and status < 500:
+        return f"OpenAI could not process the request: {getattr(cause, 'message', cause)}"
+    return "OpenAI is unavailable right now. Please try again in a minute."
 
 # =============================
 # FORMATTING HELPERS
@@ -173,6 +490,16 @@ def format_bullet_points(summary):
             formatted.append(line)
     return "\n".join(formatted)
 
+def render_summary(placeholder, summary, summary_type, final=False):
+    if summary_type == "Bullet Points":
+        placeholder.markdown(format_bullet_points(summary))
+    elif summary_type == "Conversational":
+        placeholder.code(format_conversation(summary), language="text")
+    elif final:
+        placeholder.text_area("", summary, height=250, label_visibility="collapsed", key="summary_output")
+    else:
+        placeholder.markdown(summary)
+
 def format_conversation(summary_text):
     lines = re.split(r'(?<=\.)\s+', summary_text.strip())
     formatted = []
@@ -693,204 +1020,428 @@ def inject_lucide_icons():
     </script>
     """, unsafe_allow_html=True)
 
+# =============================
+# BACKGROUND JOBS
+# =============================
+
+def run_download_stage(job):
+    if get_cached_transcript(job["video_url"]):
+        return {}
+    stats = {}
+    if acquire_captions(job["video_url"], job["workdir"], stats):
+        return {"transcript_source": stats["transcript_source"], "time_saved_seconds": stats["time_saved_seconds"]}
+    audio_path = download_audio(job["video_url"], job["workdir"], stats)
+    if not audio_path:
+        raise RuntimeError("audio download failed")
+    return {"audio_path": audio_path, "download_stats": stats, "transcript_source": "asr"}
+
+def run_transcribe_stage(job):
+    audio_path = job["result"].get("audio_path") or find_audio_file(job["workdir"])
+    stats = {}
+    text = transcribe_audio(audio_path, job["video_url"], job["workdir"], stats)
+    if not text:
+        raise RuntimeError("transcription failed")
+    return {"transcript": text, **stats}
+
+def run_summarize_stage(job):
+    text = job["result"]["transcript"]
+    cached = get_cached_transcript(job["video_url"])
+    segments = cached["segments"] if cached and cached["text"] == text else None
+    report = {}
+    summary = summarize_text_openai(text, job["summary_type"], job["language"], segments, report=report)
+    save_history({
+        "video_url": job["video_url"],
+        "summary_type": job["summary_type"],
+        "language": job["language"],
+        "summary": summary,
+        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    })
+    return {"summary": summary, **compaction_result(report)}
+
+@st.cache_resource
+def get_job_queue():
+    # Cached across reruns and sessions: one set of stage pools per server process
+    queue = jobs.JobQueue({
+        "download": run_download_stage,
+        "transcribe": run_transcribe_stage,
+        "summarize": run_summarize_stage,
+    })
+    queue.resume()
+    return queue
+
+# =============================
+# SESSION WORKSPACE
+# =============================
+
+def get_session_workspace():
+    workdir = st.session_state.get("workdir")
+    if not workdir or not os.path.isdir(workdir):
+        workdir = workspace.create_workspace()
+        st.session_state["workdir"] = workdir
+    workspace.touch_workspace(workdir)
+    return workdir
+
 # =============================
 # STREAMLIT UI
 # =============================
 
-st.set_page_config(
-    page_title="YouTube AI Summarizer",
-    layout="wide",
-    initial_sidebar_state="expanded"
-)
-
-apply_modern_styling()
-inject_lucide_icons()
-
-# Header
-st.markdown("""
-    <h1>
-        <svg viewBox="0 0 24 24" width="40" height="40" fill="#FF0000">
-            <path d="M23.498 6.186a3.016 3.016 0 0 0-2.122-2.136C19.505 3.545 12 3.545 12 3.545s-7.505 0-9.377.505A3.017 3.017 0 0 0 .502 6.186C0 8.07 0 12 0 12s0 3.93.502 5.814a3.016 3.016 0 0 0 2.122 2.136c1.871.505 9.376.505 9.376.505s7.505 0 9.377-.505a3.015 3.015 0 0 0 2.122-2.136C24 15.93 24 12 24 12s0-3.93-.502-5.814zM9.545 15.568V8.432L15.818 12l-6.273 3.568z"/>
-        </svg>
-        YouTube AI Summarizer
-    </h1>
-""", unsafe_allow_html=True)
-
-st.markdown('<p class="subtitle">Transform YouTube videos into intelligent summaries with AI-powered transcription and translation</p>', unsafe_allow_html=True)
-
-# Input Card
-st.markdown('<p data-card="input" class="card-title icon-heading"><i data-lucide="settings-2"></i><span>Input & Configuration</span></p>', unsafe_allow_html=True)
-
-video_url = st.text_input("YouTube URL", placeholder="https://www.youtube.com/watch?v=...", label_visibility="visible")
-
-col_format, col_lang = st.columns(2)
-with col_format:
-    summary_type = st.selectbox("Summary Format", ["Paragraph", "Bullet Points", "Conversational"])
-with col_lang:
-    language = st.selectbox("Output Language", ["English", "Kannada", "Hindi","Tamil","Telugu","Malayalam","Bengali","French","Arabic","Korean"])
-
-# Processing Workflow
-st.markdown('<p data-card="workflow-title" class="card-title icon-heading" style="margin-top: 2rem;"><i data-lucide="workflow"></i><span>Processing Workflow</span></p>', unsafe_allow_html=True)
-
-# Create 3 columns for workflow steps
-col1, col2, col3 = st.columns(3, gap="large")
-
-# Step 1: Download
-with col1:
-    with st.container():
-        st.markdown('''
-            <div class="step-header" data-card="workflow-step">
-                <span class="step-number">1</span>
-                <h3 class="step-title"><i data-lucide="download"></i>Download Audio</h3>
-            </div>
-            <p class="step-description">Extract high-quality audio from the YouTube video</p>
-        ''', unsafe_allow_html=True)
-
-        if st.button("Start Download", key="btn_download", use_container_width=True):
-            with st.spinner("Downloading audio from YouTube..."):
-                audio_path = download_audio(video_url)
-                if audio_path:
-                    st.success("Audio downloaded successfully!")
-                    st.audio(audio_path)
-
-# Step 2: Transcribe
-with col2:
-    with st.container():
-        st.markdown('''
-            <div class="step-header" data-card="workflow-step">
-                <span class="step-number">2</span>
-                <h3 class="step-title"><i data-lucide="mic"></i>Transcribe Audio</h3>
-            </div>
-            <p class="step-description">Convert speech to text using advanced AI technology</p>
-        ''', unsafe_allow_html=True)
-
-        if st.button("Start Transcription", key="btn_transcribe", use_container_width=True):
-            with st.spinner("Transcribing audio... This may take a minute"):
-                transcript = transcribe_audio()
-                if transcript:
-                    st.success("Transcription completed!")
-                    with st.expander("View Full Transcript"):
-                        st.text_area("", transcript, height=200, label_visibility="collapsed", key="transcript_view")
-
-# Step 3: Summarize
-with col3:
-    with st.container():
-        st.markdown('''
-            <div class="step-header" data-card="workflow-step">
-                <span class="step-number">3</span>
-                <h3 class="step-title"><i data-lucide="file-text"></i>Generate Summary</h3>
-            </div>
-            <p class="step-description">Create an intelligent summary in your chosen language and format</p>
-        ''', unsafe_allow_html=True)
+def main():
+    st.set_page_config(
+        page_title="YouTube AI Summarizer",
+        layout="wide",
+        initial_sidebar_state="expanded"
+    )
+
+    begin_session_run()
+    apply_modern_styling()
+    inject_lucide_icons()
+    workdir = get_session_workspace()
+
+    # Header
+    st.markdown("""
+        <h1>
+            <svg viewBox="0 0 24 24" width="40" height="40" fill="#FF0000">
+                <path d="M23.498 6.186a3.016 3.016 0 0 0-2.122-2.136C19.505 3.545 12 3.545 12 3.545s-7.505 0-9.377.505A3.017 3.017 0 0 0 .502 6.186C0 8.07 0 12 0 12s0 3.93.502 5.814a3.016 3.016 0 0 0 2.122 2.136c1.871.505 9.376.505 9.376.505s7.505 0 9.377-.505a3.015 3.015 0 0 0 2.122-2.136C24 15.93 24 12 24 12s0-3.93-.502-5.814zM9.545 15.568V8.432L15.818 12l-6.273 3.568z"/>
+            </svg>
+            YouTube AI Summarizer
+        </h1>
+    """, unsafe_allow_html=True)
+
+    st.markdown('<p class="subtitle">Transform YouTube videos into intelligent summaries with AI-powered transcription and translation</p>', unsafe_allow_html=True)
+
+    # Input Card
+    st.markdown('<p data-card="input" class="card-title icon-heading"><i data-lucide="settings-2"></i><span>Input & Configuration</span></p>', unsafe_allow_html=True)
+
+    video_url = st.text_input("YouTube URL", placeholder="https://www.youtube.com/watch?v=...", label_visibility="visible")
+
+    col_format, col_lang = st.columns(2)
+    with col_format:
+        summary_type = st.selectbox("Summary Format", SUMMARY_TYPES)
+    with col_lang:
+        language = st.selectbox("Output Language", LANGUAGES)
+
+    stream_mode = st.toggle("Transcribe while downloading", help="Start transcription as soon as the first audio arrives instead of after the download finishes")
+
+    # Processing Workflow
+    st.markdown('<p data-card="workflow-title" class="card-title icon-heading" style="margin-top: 2rem;"><i data-lucide="workflow"></i><span>Processing Workflow</span></p>', unsafe_allow_html=True)
 
-        if st.button("Generate Summary", key="btn_summarize", use_container_width=True):
-            if os.path.exists("transcript.txt"):
-                with open("transcript.txt", "r", encoding="utf-8") as f:
-                    text = f.read()
-                with st.spinner(f"Generating {summary_type} summary in {language}..."):
-                    summary = summarize_text_openai(text, summary_type, language)
-                    st.success(f"Summary generated in {language}!")
+    # Create 3 columns for workflow steps
+    col1, col2, col3 = st.columns(3, gap="large")
 
+    # Step 1: Download
+    with col1:
+        with st.container():
+            st.markdown('''
+                <div class="step-header" data-card="workflow-step">
+                    <span class="step-number">1</span>
+                    <h3 class="step-title"><i data-lucide="download"></i>Download Audio</h3>
+                </div>
+                <p class="step-description">Extract high-quality audio from the YouTube video</p>
+            ''', unsafe_allow_html=True)
+
+            if st.button("Start Download", key="btn_download", use_container_width=True):
+                cached = get_cached_transcript(video_url)
+                caption_stats = {}
+                captioned = None
+                if not cached:
+                    with st.spinner("Looking for YouTube captions..."):
+                        captioned = acquire_captions(video_url, workdir, caption_stats)
+                if cached:
+                    write_transcript(cached["text"], workdir)
+                    st.success("This video was already transcribed. Skipping download, go straight to Generate Summary!")
+                elif captioned:
+                    st.success(
+                        f"Using the video's {caption_stats['transcript_source']} captions "
+                        f"({caption_stats['caption_language']}) — no download or transcription needed, "
+                        f"about {caption_stats['time_saved_seconds']}s saved. Go straight to Generate Summary!"
+                    )
+                elif stream_mode:
+                    live_transcript = st.empty()
+                    with st.spinner("Downloading and transcribing..."):
+                        transcript = stream_download_and_transcribe(video_url, workdir, live_transcript)
+                    if transcript:
+                        st.success("Transcription completed while downloading!")
+                    else:
+                        st.error("No speech could be transcribed from the stream.")
+                else:
+                    with st.spinner("Downloading audio from YouTube..."):
+                        audio_path = download_audio(video_url, workdir)
+                        if audio_path:
+                            st.success("Audio downloaded successfully!")
+                            st.audio(audio_path)
+
+    # Step 2: Transcribe
+    with col2:
+        with st.container():
+            st.markdown('''
+                <div class="step-header" data-card="workflow-step">
+                    <span class="step-number">2</span>
+                    <h3 class="step-title"><i data-lucide="mic"></i>Transcribe Audio</h3>
+                </div>
+                <p class="step-description">Convert speech to text using advanced AI technology</p>
+            ''', unsafe_allow_html=True)
+
+            if st.button("Start Transcription", key="btn_transcribe", use_container_width=True):
+                with st.spinner("Transcribing audio... This may take a minute"):
+                    transcript = transcribe_audio(find_audio_file(workdir), video_url, workdir)
+                    if transcript:
+                        st.success("Transcription completed!")
+                        with st.expander("View Full Transcript"):
+                            st.text_area("", transcript, height=200, label_visibility="collapsed", key="transcript_view")
+
+    # Step 3: Summarize
+    with col3:
+        with st.container():
+            st.markdown('''
+                <div class="step-header" data-card="workflow-step">
+                    <span class="step-number">3</span>
+                    <h3 class="step-title"><i data-lucide="file-text"></i>Generate Summary</h3>
+                </div>
+                <p class="step-description">Create an intelligent summary in your chosen language and format</p>
+            ''', unsafe_allow_html=True)
+
+            if st.button("Generate Summary", key="btn_summarize", use_container_width=True):
+                text = read_transcript(workdir)
+                if text is not None:
+                    cached = get_cached_transcript(video_url)
+                    segments = cached["segments"] if cached and cached["text"] == text else None
                     with st.container():
                         st.markdown('<div data-summary-card-marker></div>', unsafe_allow_html=True)
                         st.markdown(f'<div class="summary-heading icon-heading"><i data-lucide="notebook-text"></i><span>{summary_type} Summary ({language})</span></div>', unsafe_allow_html=True)
-                        
-                        if summary_type == "Bullet Points":
-                            formatted = format_bullet_points(summary)
-                            st.markdown(formatted)
-                        elif summary_type == "Conversational":
-                            formatted = format_conversation(summary)
-                            st.code(formatted, language="text")
-                        else:
-                            st.text_area("", summary, height=250, label_visibility="collapsed", key="summary_output")
-
-                    # Save to history
-                    entry = {
-                        "video_url": video_url,
-                        "summary_type": summary_type,
-                        "language": language,
-                        "summary": summary,
-                        "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-                    }
-                    save_history(entry)
-            else:
+                        placeholder = st.empty()
+
+                        summary = ""
+                        last_render = 0.0
+                        report = {}
+                        try:
+                            with st.spinner(f"Generating {summary_type} summary in {language}..."):
+                                for token in summarize_text_openai(text, summary_type, language, segments, stream=True, report=report):
+                                    summary += token
+                                    # Re-formatting the whole text per token is quadratic, so redraw at most ~10x/s
+                                    if time.perf_counter() - last_render > 0.1:
+                                        render_summary(placeholder, summary, summary_type)
+                                        last_render = time.perf_counter()
+                        except llm_client.LLMRequestError as e:
+                            summary = None
+                            placeholder.empty()
+                            st.error(friendly_llm_error(e))
+                        if summary is not None:
+                            summary = summary.strip()
+                            render_summary(placeholder, summary, summary_type, final=True)
+                    if summary is not None:
+                        st.success(f"Summary generated in {language}!")
+                        if describe_compaction(report):
+                            st.caption(describe_compaction(report))
+
+                        # Save to history only once the stream has finished
+                        entry = {
+                            "video_url": video_url,
+                            "summary_type": summary_type,
+                            "language": language,
+                            "summary": summary,
+                            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                        }
+                        save_history(entry)
+                else:
+                    st.error("Please complete transcription first.")
+
+    # Batch Summaries
+    with st.expander("Generate several formats and languages at once", expanded=False):
+        batch_types = st.multiselect("Summary Formats", SUMMARY_TYPES, default=[summary_type], key="batch_types")
+        batch_languages = st.multiselect("Output Languages", LANGUAGES, default=[language], key="batch_languages")
+        if st.button("Generate All", key="btn_batch", use_container_width=True):
+            text = read_transcript(workdir)
+            if text is None:
                 st.error("Please complete transcription first.")
+            elif not batch_types or not batch_languages:
+                st.error("Pick at least one format and one language.")
+            else:
+                cached = get_cached_transcript(video_url)
+                segments = cached["segments"] if cached and cached["text"] == text else None
+                slots = {
+                    (t, l): st.empty() for t in batch_types for l in batch_languages
+                }
+                for slot in slots.values():
+                    slot.caption("Waiting...")
+                report = {}
+                try:
+                    with st.spinner(f"Generating {len(slots)} summaries..."):
+                        for batch_type, batch_language, summary in summarize_batch(text, batch_types, batch_languages, segments, report):
+                            with slots[(batch_type, batch_language)].container():
+                                st.markdown(f"**{batch_type} Summary ({batch_language})**")
+                                render_summary(st.empty(), summary, batch_type)
+                            save_history({
+                                "video_url": video_url,
+                                "summary_type": batch_type,
+                                "language": batch_language,
+                                "summary": summary,
+                                "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+                            })
+                except llm_client.LLMRequestError as e:
+                    st.error(friendly_llm_error(e))
+                if describe_compaction(report):
+                    st.caption(describe_compaction(report))
+                if "sent_transcript_tokens" in report:
+                    st.caption(
+                        f"Transcript tokens sent: {report['sent_transcript_tokens']:,} "
+                        f"(vs {report['naive_transcript_tokens']:,} for {report['combinations']} separate requests)"
+                    )
+
+    # Background Jobs
+    st.markdown('<p class="card-title icon-heading" style="margin-top: 2rem;"><i data-lucide="list-checks"></i><span>Background Jobs</span></p>', unsafe_allow_html=True)
+
+    job_urls = st.text_area("YouTube URLs (one per line)", placeholder="https://www.youtube.com/watch?v=...", height=100, key="job_urls")
+    col_queue, col_refresh = st.columns(2)
+    with col_queue:
+        if st.button("Run Full Pipeline in Background", key="btn_queue", use_container_width=True):
+            urls = [u.strip() for u in (job_urls or video_url).splitlines() if u.strip()]
+            if urls:
+                job_ids = get_job_queue().submit_many(urls, summary_type, language)
+                st.session_state.setdefault("job_ids", []).extend(job_ids)
+                st.success(f"Queued {len(job_ids)} job(s).")
+            else:
+                st.error("Please enter at least one YouTube URL.")
+    with col_refresh:
+        st.button("Refresh Job Status", key="btn_refresh_jobs", use_container_width=True)
+
+    if st.session_state.get("job_ids"):
+        for job in get_job_queue().list_jobs(st.session_state["job_ids"]):
+            label = f"{job['video_url'][:50]} · {job['stage']} · {job['status']}"
+            with st.expander(label, expanded=False):
+                if job["status"] == "failed":
+                    st.error(job["error"])
+                if job["result"].get("transcript_source"):
+                    st.caption(f"Transcript source: {job['result']['transcript_source']}")
+                if job["result"].get("removed_fraction"):
+                    st.caption(f"Silence skipped before transcription: {job['result']['removed_fraction']:.0%}")
+                if describe_compaction(job["result"]):
+                    st.caption(describe_compaction(job["result"]))
+                timings = {k: v for k, v in job["result"].items() if k.endswith("_seconds")}
+                if timings:
+                    st.caption(" · ".join(f"{k.replace('_seconds', '')}: {v}s" for k, v in timings.items()))
+                if job["result"].get("summary"):
+                    st.text_area("", job["result"]["summary"], height=200, label_visibility="collapsed", key=f"job_{job['id']}")
+
+    how_cards = [
+        {
+            "title": "Step 1 · Share the video link",
+            "description": "Paste any public YouTube URL and pick the summary style and language that fits your workflow.",
+            "icon": "link-2",
+            "accent": "#2563eb"
+        },
+        {
+            "title": "Step 2 · Let the AI do the heavy lifting",
+            "description": "Kick off download + transcription. We fetch the audio, run Whisper, and prep the transcript automatically.",
+            "icon": "cpu",
+            "accent": "#d97706"
+        },
+        {
+            "title": "Step 3 · Review and reuse the summary",
+            "description": "Generate concise paragraphs, bullets, or dialogue recaps and save them to history for quick access.",
+            "icon": "notebook-text",
+            "accent": "#16a34a"
+        }
+    ]
 
-how_cards = [
-    {
-        "title": "Step 1 · Share the video link",
-        "description": "Paste any public YouTube URL and pick the summary style and language that fits your workflow.",
-        "icon": "link-2",
-        "accent": "#2563eb"
-    },
-    {
-        "title": "Step 2 · Let the AI do the heavy lifting",
-        "description": "Kick off download + transcription. We fetch the audio, run Whisper, and prep the transcript automatically.",
-        "icon": "cpu",
-        "accent": "#d97706"
-    },
-    {
-        "title": "Step 3 · Review and reuse the summary",
-        "description": "Generate concise paragraphs, bullets, or dialogue recaps and save them to history for quick access.",
-        "icon": "notebook-text",
-        "accent": "#16a34a"
-    }
-]
-
-how_cards_html = "".join([
-    f"""
-    <div class="how-card">
-        <div class="how-card-icon" style="background: {card['accent']}1a; color: {card['accent']};">
-            <i data-lucide="{card['icon']}"></i>
+    how_cards_html = "".join([
+        f"""
+        <div class="how-card">
+            <div class="how-card-icon" style="background: {card['accent']}1a; color: {card['accent']};">
+                <i data-lucide="{card['icon']}"></i>
+            </div>
+            <h4>{card['title']}</h4>
+            <p>{card['description']}</p>
         </div>
-        <h4>{card['title']}</h4>
-        <p>{card['description']}</p>
-    </div>
-    """
-    for card in how_cards
-])
-
-st.markdown(f"""
-    <div class="how-section">
-        <h2>How to Summarize YouTube Videos?</h2>
-        <p>You can turn any video into a structured summary in just three guided steps.</p>
-        <div class="how-grid">
-            {how_cards_html}
+        """
+        for card in how_cards
+    ])
+
+    st.markdown(f"""
+        <div class="how-section">
+            <h2>How to Summarize YouTube Videos?</h2>
+            <p>You can turn any video into a structured summary in just three guided steps.</p>
+            <div class="how-grid">
+                {how_cards_html}
+            </div>
         </div>
-    </div>
-""", unsafe_allow_html=True)
+    """, unsafe_allow_html=True)
 
-st.markdown('<script>window.renderLucideIcons && window.renderLucideIcons();</script>', unsafe_allow_html=True)
+    st.markdown('<script>window.renderLucideIcons && window.renderLucideIcons();</script>', unsafe_allow_html=True)
 
-st.markdown('<script>window.renderLucideIcons && window.renderLucideIcons();</script>', unsafe_allow_html=True)
+    st.markdown('<script>window.renderLucideIcons && window.renderLucideIcons();</script>', unsafe_allow_html=True)
 
-# =============================
-# SIDEBAR HISTORY
-# =============================
+    # =============================
+    # SIDEBAR HISTORY
+    # =============================
 
-with st.sidebar:
-    st.markdown('<div class="icon-heading" style="font-size:1.25rem;"><i data-lucide="clock-3"></i><span>History</span></div>', unsafe_allow_html=True)
-    
-    history = load_history()
-    st.markdown(f"**{len(history)} summaries saved**")
-    st.markdown("")
-    
-    if st.button("Clear All History", use_container_width=True):
-        open(HISTORY_FILE, "w").write("[]")
-        st.success("History cleared!")
-        st.rerun()
-    
-    st.markdown("---")
-    
-    if history:
-        for idx, item in enumerate(history[:10]):
-            with st.expander(f"{item['timestamp']}", expanded=False):
-                st.markdown("**Video**")
-                st.caption(f"[{item['video_url'][:40]}...]({item['video_url']})")
-                st.markdown(f"**Language:** {item['language']}")
-                st.markdown(f"**Format:** {item['summary_type']}")
-                st.markdown("**Summary:**")
-                summary_preview = item['summary'][:300] + "..." if len(item['summary']) > 300 else item['summary']
-                st.text_area("", summary_preview, height=120, key=f"hist_{idx}", label_visibility="collapsed")
-    else:
-        st.info("No summaries yet. Process your first video!")
+    with st.sidebar:
+        st.markdown('<div class="icon-heading" style="font-size:1.25rem;"><i data-lucide="clock-3"></i><span>History</span></div>', unsafe_allow_html=True)
+
+        import_legacy_history()
+        history_version = history_store.version()
+        history_total = history_store.count()
+        st.markdown(f"**{history_total} summaries saved**")
+        st.markdown("")
+
+        if st.button("Clear All History", use_container_width=True):
+            history_store.clear()
+            st.session_state["history_pages"] = 1
+            st.success("History cleared!")
+            st.rerun()
+
+        st.markdown("---")
+
+        query = st.text_input("Search", placeholder="Search summaries and transcripts",
+                              key="history_search", label_visibility="collapsed")
+        if query:
+            filter_col1, filter_col2 = st.columns(2)
+            with filter_col1:
+                search_language = st.selectbox("Language", ["All"] + LANGUAGES, key="search_language")
+            with filter_col2:
+                search_type = st.selectbox("Format", ["All"] + SUMMARY_TYPES, key="search_type")
+            results = history_store.search(
+                query, limit=20,
+                language=None if search_language == "All" else search_language,
+                summary_type=None if search_type == "All" else search_type,
+            )
+            transcript_results = history_store.search_transcripts(query, limit=10)
+            st.caption(f"{len(results)} summaries, {len(transcript_results)} transcripts")
+            for item in results:
+                st.markdown(f"**{item['summary_type']} · {item['language']}** · [{item['timestamp']}]({item['video_url']})")
+                st.markdown(item["snippet"])
+            if transcript_results:
+                st.markdown("**Transcripts**")
+            for item in transcript_results:
+                st.markdown(f"[{item['video_url']}]({item['video_url']})")
+                st.markdown(item["snippet"])
+        elif history_total:
+            # Pages chain on the last id of the page before, so each one is an index seek
+            before_id, shown = None, 0
+            for _ in range(st.session_state.get("history_pages", 1)):
+                entries = history_page(history_version, before_id)
+                for item in entries:
+                    render_history_entry(item)
+                shown += len(entries)
+                if len(entries) < HISTORY_PAGE_SIZE:
+                    break
+                before_id = entries[-1]["id"]
+            if shown < history_total:
+                st.button(f"Load more ({history_total - shown:,} older)", key="history_more",
+                          on_click=load_more_history, use_container_width=True)
+        else:
+            st.info("No summaries yet. Process your first video!")
+
+        loaded_models = model_registry.model_stats()
+        if loaded_models:
+            st.markdown("---")
+            with st.expander("Loaded ASR Models", expanded=False):
+                for m in loaded_models:
+                    st.caption(
+                        f"{m['engine']} {m['model_size']} · {m['device']} · {m['dtype']} — "
+                        f"loaded in {m['load_seconds']}s, {m['memory_mb']} MB, "
+                        f"{m['uses']} runs, idle {m['idle_seconds']}s"
+                    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,226 @@
+# Speech-recognition engines
+# One adapter per ASR backend, all returning Whisper's result shape
+#   {"text", "language", "segments": [{"start", "end", "text", "words"}]}
+# so the model registry, the parallel and streaming paths and the transcript cache do
+# not care which one ran:
+#   whisper         openai-whisper on torch (fp16 on GPU, fp32 on CPU)
+#   faster-whisper  CTranslate2 with int8 weights on CPU: the same models, several times faster
+#   whisper.cpp     ggml through pywhispercpp; the compute type picks the quantized model
+#                   file, e.g. ("small", "q5_1") loads "small-q5_1"
+# Each backend is imported only when first used.
+# Run `python asr_engines.py --engines whisper:small,faster-whisper:small:int8` to compare
+# real-time factor on the benchmark fixtures. WER needs real speech with a reference
+# transcript: pass --fixtures with audio next to same-named .txt files.
+
+import os
+import json
+import time
+import shutil
+import argparse
+import subprocess
+
+import numpy as np
+
+# =============================
+# CONFIGURATION
+# =============================
+
+SAMPLE_RATE = 16000
+DEFAULT_ENGINE = "whisper"
+
+def load_audio(path):
+    """Decodes any media file to 16 kHz mono float32, like whisper.load_audio."""
+    out = subprocess.run(
+        [shutil.which("ffmpeg") or "ffmpeg", "-nostdin", "-loglevel", "error", "-i", path,
+         "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+        capture_output=True, check=True,
+    ).stdout
+    return np.frombuffer(out, np.int16).astype(np.float32) / 32768.0
+
+def _result(segments, language):
+    return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": language}
+
+# =============================
+# ENGINES
+# =============================
+
+class WhisperEngine:
+    name = "whisper"
+
+    def default_device(self):
+        import torch
+        return "cuda" if torch.cuda.is_available() else "cpu"
+
+    def default_compute_type(self, device):
+        # Whisper only decodes in fp16 on GPU; on CPU it falls back to fp32 anyway
+        return "fp16" if device.startswith("cuda") else "fp32"
+
+    def load(self, model_size, device, compute_type, threads=None):
+        import torch
+        import whisper
+        if threads:
+            torch.set_num_threads(threads)
+        return whisper.load_model(model_size, device=device)
+
+    def transcribe(self, model, audio, compute_type, **options):
+        options.setdefault("fp16", compute_type == "fp16")
+        return model.transcribe(audio, **options)
+
+    def memory_bytes(self, model):
+        params = sum(p.numel() * p.element_size() for p in model.parameters())
+        buffers = sum(b.numel() * b.element_size() for b in model.buffers())
+        return params + buffers
+
+class FasterWhisperEngine:
+    name = "faster-whisper"
+
+    def default_device(self):
+        import ctranslate2
+        return "cuda" if ctranslate2.get_cuda_device_count() else "cpu"
+
+    def default_compute_type(self, device):
+        return "float16" if device.startswith("cuda") else "int8"
+
+    def load(self, model_size, device, compute_type, threads=None):
+        from faster_whisper import WhisperModel
+        return WhisperModel(model_size, device=device, compute_type=compute_type, cpu_threads=threads or 0)
+
+    def transcribe(self, model, audio, compute_type, **options):
+        options.pop("fp16", None)
+        options.pop("verbose", None)
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+        segments, info = model.transcribe(audio, **options)
+        return _result([
+            {
+                "start": s.start, "end": s.end, "text": s.text,
+                "words": [{"word": w.word, "start": w.start, "end": w.end} for w in (s.words or [])],
+            }
+            for s in segments  # a generator: decoding happens while iterating
+        ], info.language)
+
+    def memory_bytes(self, model):
+        return None
+
+class WhisperCppEngine:
+    name = "whisper.cpp"
+
+    def default_device(self):
+        return "cpu"
+
+    def default_compute_type(self, device):
+        return "f16"
+
+    def load(self, model_size, device, compute_type, threads=None):
+        from pywhispercpp.model import Model
+        name = model_size if compute_type in (None, "f16") else f"{model_size}-{compute_type}"
+        params = {"print_progress": False, "print_realtime": False}
+        if threads:
+            params["n_threads"] = threads
+        return Model(name, redirect_whispercpp_logs_to=None, **params)
+
+    def transcribe(self, model, audio, compute_type, **options):
+        params = {"language": options.get("language") or "auto"}
+        if options.get("initial_prompt"):
+            params["initial_prompt"] = options["initial_prompt"]
+        if options.get("beam_size"):
+            params["beam_search"] = {"beam_size": options["beam_size"], "patience": -1.0}
+        if isinstance(audio, np.ndarray):
+            audio = audio.astype(np.float32, copy=False)
+        segments = model.transcribe(audio, **params)
+        # whisper.cpp timestamps are in units of 10 ms
+        return _result(
+            [{"start": s.t0 / 100, "end": s.t1 / 100, "text": s.text, "words": []} for s in segments],
+            options.get("language"),
+        )
+
+    def memory_bytes(self, model):
+        return None
+
+ENGINES = {engine.name: engine for engine in (WhisperEngine(), FasterWhisperEngine(), WhisperCppEngine())}
+
+def get_engine(name):
+    try:
+        return ENGINES[name or DEFAULT_ENGINE]
+    except KeyError:
+        raise ValueError(f"unknown ASR engine {name!r}; choose from {', '.join(ENGINES)}") from None
+
+# =============================
+# COMPARISON
+# =============================
+
+def parse_config(spec):
+    """"engine:size[:compute_type[:threads[:beam_size]]]" -> dict."""
+    parts = spec.split(":")
+    return {
+        "engine": parts[0],
+        "model_size": parts[1] if len(parts) > 1 else "small",
+        "compute_type": parts[2] if len(parts) > 2 and parts[2] else None,
+        "threads": int(parts[3]) if len(parts) > 3 and parts[3] else None,
+        "beam_size": int(parts[4]) if len(parts) > 4 and parts[4] else None,
+    }
+
+def compare(fixtures, configs):
+    """Transcribes every fixture with every config. WER is measured against a reference
+    transcript next to the audio (same name, .txt); without one it is None."""
+    from parallel_transcribe import word_error_rate
+    import model_registry
+
+    references, results = {}, []
+    for path, label, seconds in fixtures:
+        ref_path = os.path.splitext(path)[0] + ".txt"
+        if os.path.exists(ref_path):
+            with open(ref_path, "r", encoding="utf-8") as f:
+                references[label] = f.read()
+
+    for config in configs:
+        engine = config["engine"]
+        start = time.perf_counter()
+        model_registry.get_model(config["model_size"], dtype=config["compute_type"], engine=engine,
+                                 threads=config["threads"])
+        row = {**config, "load_seconds": round(time.perf_counter() - start, 2), "fixtures": {}}
+        options = {"beam_size": config["beam_size"]} if config["beam_size"] else {}
+        for path, label, seconds in fixtures:
+            audio = load_audio(path)
+            start = time.perf_counter()
+            result = model_registry.transcribe(audio, config["model_size"], dtype=config["compute_type"],
+                                               engine=engine, **options)
+            decode_seconds = time.perf_counter() - start
+            reference = references.get(label)
+            row["fixtures"][label] = {
+                "audio_seconds": round(seconds, 1),
+                "decode_seconds": round(decode_seconds, 2),
+                "real_time_factor": round(decode_seconds / seconds, 4) if seconds else None,
+                "wer": round(word_error_rate(reference, result["text"]), 4) if reference is not None else None,
+            }
+        results.append(row)
+        model_registry.evict_idle_models(0)  # one model in memory at a time
+    return results
+
+if __name__ == "__main__":
+    import benchmark
+
+    parser = argparse.ArgumentParser(description="Compare ASR engines on real-time factor and WER")
+    parser.add_argument("--engines", default="whisper:small,faster-whisper:small:int8",
+                        help="comma-separated engine:size[:compute_type[:threads[:beam_size]]]")
+    parser.add_argument("--fixtures", help="directory of audio files (with optional .txt references)")
+    parser.add_argument("--lengths", default=",".join(map(str, benchmark.AUDIO_LENGTHS)))
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    if args.fixtures:
+        fixtures = benchmark.load_fixtures(args.fixtures)
+    else:
+        fixtures = benchmark.build_fixtures(os.path.join("bench_results", "fixtures"),
+                                            [int(x) for x in args.lengths.split(",")])
+    results = compare(fixtures, [parse_config(spec) for spec in args.engines.split(",")])
+    for row in results:
+        print(f"{row['engine']} {row['model_size']} {row['compute_type'] or 'default'}"
+              f" (threads={row['threads'] or 'default'}, beam={row['beam_size'] or 'default'}),"
+              f" load {row['load_seconds']}s")
+        for label, stats in row["fixtures"].items():
+            wer = stats["wer"] if stats["wer"] is not None else "n/a"
+            print(f"  {label:>24}: RTF {stats['real_time_factor']}, WER {wer}")
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=4)
@@ -0,0 +1,420 @@
+# Offline pipeline benchmark
+# Runs download -> transcribe -> summarize and history I/O without network access:
+#   * synthetic speech-like audio fixtures of several lengths, plus one with silent
+#     intro, outro and long pauses (or your own via --fixtures)
+#   * downloads go through the real download_audio() against a local HTTP server
+#   * summaries go to a fake OpenAI-compatible server with configurable latency
+#   * history stores of several sizes
+# Reports p50/p95 latency, throughput, peak RSS (sampled while each case runs) and
+# real-time factor per stage and writes the results as JSON so runs can be compared:
+#   python benchmark.py --out bench_results/run.json --compare bench_results/previous.json
+
+import os
+import sys
+import json
+import math
+import time
+import wave
+import random
+import shutil
+import struct
+import argparse
+import resource
+import tempfile
+import threading
+import statistics
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import app
+import history_store
+import summary_cache
+import transcript_cache
+import streaming_pipeline
+import llm_client
+
+# =============================
+# CONFIGURATION
+# =============================
+
+AUDIO_LENGTHS = [30, 120, 600]  # seconds
+HISTORY_SIZES = [1_000, 10_000, 100_000]
+# Fixture with silence for preprocessing to remove: intro, outro and pauses between stretches
+PAUSED_FIXTURE_SECONDS = 180
+PAUSED_INTRO_SECONDS = 20
+PAUSED_OUTRO_SECONDS = 15
+PAUSED_SPEECH_SECONDS = 20
+PAUSED_GAP_SECONDS = 6
+SAMPLE_RATE = 16000
+
+# =============================
+# FIXTURES
+# =============================
+
+def _speech(seconds, rng):
+    """16-bit PCM of syllable-like tone bursts separated by short pauses."""
+    frames = bytearray()
+    t = 0
+    total = int(seconds * SAMPLE_RATE)
+    while t < total:
+        burst = int(rng.uniform(0.15, 0.4) * SAMPLE_RATE)
+        freq = rng.uniform(120, 300)
+        for i in range(min(burst, total - t)):
+            envelope = math.sin(math.pi * i / burst)
+            sample = 0.3 * envelope * (math.sin(2 * math.pi * freq * i / SAMPLE_RATE)
+                                       + 0.5 * math.sin(4 * math.pi * freq * i / SAMPLE_RATE))
+            frames += struct.pack("<h", int(sample * 32767))
+        t += burst
+        pause = min(int(rng.choice([0.05, 0.1, 0.1, 0.6]) * SAMPLE_RATE), max(0, total - t))
+        frames += b"\x00\x00" * pause
+        t += pause
+    return frames
+
+def _silence(seconds):
+    return b"\x00\x00" * int(seconds * SAMPLE_RATE)
+
+def _write_wav(path, frames):
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes(bytes(frames))
+    return path
+
+def synth_audio(path, seconds, seed=0):
+    """Writes a 16 kHz mono WAV of syllable-like tone bursts separated by pauses."""
+    return _write_wav(path, _speech(seconds, random.Random(seed)))
+
+def synth_paused_audio(path, seconds, seed=0):
+    """Like synth_audio, but with a silent intro and outro and long pauses between
+    stretches of speech: the audio AUDIO_PREPROCESS is meant to trim."""
+    rng = random.Random(seed)
+    frames = bytearray(_silence(PAUSED_INTRO_SECONDS))
+    speech_seconds = seconds - PAUSED_INTRO_SECONDS - PAUSED_OUTRO_SECONDS
+    while speech_seconds > 0:
+        stretch = min(PAUSED_SPEECH_SECONDS, speech_seconds)
+        frames += _speech(stretch, rng)
+        speech_seconds -= stretch
+        if speech_seconds > 0:
+            pause = min(PAUSED_GAP_SECONDS, speech_seconds)
+            frames += _silence(pause)
+            speech_seconds -= pause
+    frames += _silence(PAUSED_OUTRO_SECONDS)
+    return _write_wav(path, frames)
+
+def build_fixtures(directory, lengths=AUDIO_LENGTHS, paused_seconds=PAUSED_FIXTURE_SECONDS):
+    """Returns (path, label, seconds) for each synthetic fixture, generating missing ones.
+    The paused fixture is the one whose speedup_vs_untrimmed measures preprocessing."""
+    os.makedirs(directory, exist_ok=True)
+    fixtures = []
+    for seconds in lengths:
+        path = os.path.join(directory, f"synthetic_{seconds}s.wav")
+        if not os.path.exists(path):
+            synth_audio(path, seconds, seed=seconds)
+        fixtures.append((path, f"{seconds}s", seconds))
+    if paused_seconds:
+        path = os.path.join(directory, f"synthetic_paused_{paused_seconds}s.wav")
+        if not os.path.exists(path):
+            synth_paused_audio(path, paused_seconds, seed=paused_seconds)
+        fixtures.append((path, f"{paused_seconds}s_paused", paused_seconds))
+    return fixtures
+
+def load_fixtures(directory):
+    import asr_engines
+    fixtures = []
+    for name in sorted(os.listdir(directory)):
+        path = os.path.join(directory, name)
+        if name.endswith(".txt"):
+            continue  # reference transcripts for asr_engines.py
+        fixtures.append((path, name, len(asr_engines.load_audio(path)) / SAMPLE_RATE))
+    return fixtures
+
+# =============================
+# FAKE OPENAI SERVER
+# =============================
+
+class FakeOpenAIServer:
+    """Minimal /v1/chat/completions (plain + SSE streaming) with configurable latency."""
+
+    def __init__(self, first_token_latency=0.3, token_latency=0.01, output_tokens=150):
+        config = {"first": first_token_latency, "per_token": token_latency, "tokens": output_tokens}
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+
+            def do_POST(self):
+                request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                prompt = request["messages"][-1]["content"]
+                tokens = [f" point{i}." if i % 12 else f"\n{i // 12 + 1}." for i in range(config["tokens"])]
+                usage = {"prompt_tokens": len(prompt) // 4, "completion_tokens": len(tokens),
+                         "total_tokens": len(prompt) // 4 + len(tokens)}
+                time.sleep(config["first"])
+                if request.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.send_header("Transfer-Encoding", "chunked")
+                    self.end_headers()
+                    for token in tokens:
+                        self._chunk({"id": "bench", "object": "chat.completion.chunk", "created": 0,
+                                     "model": request["model"],
+                                     "choices": [{"index": 0, "delta": {"content": token}, "finish_reason": None}]})
+                        time.sleep(config["per_token"])
+                    self._chunk({"id": "bench", "object": "chat.completion.chunk", "created": 0,
+                                 "model": request["model"], "choices": [], "usage": usage})
+                    self._write(b"data: [DONE]\n\n")
+                    self._write(b"")
+                    return
+                time.sleep(config["per_token"] * len(tokens))
+                body = json.dumps({
+                    "id": "bench", "object": "chat.completion", "created": 0, "model": request["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": "".join(tokens)}}],
+                    "usage": usage,
+                }).encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def _chunk(self, payload):
+                self._write(f"data: {json.dumps(payload)}\n\n".encode("utf-8"))
+
+            def _write(self, data):
+                self.wfile.write(f"{len(data):x}\r\n".encode("ascii") + data + b"\r\n")
+                self.wfile.flush()
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+        self.base_url = f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def shutdown(self):
+        self.server.shutdown()
+
+# =============================
+# MEASUREMENT
+# =============================
+
+RSS_SAMPLE_SECONDS = 0.01
+
+def current_rss_mb():
+    """VmRSS from /proc; elsewhere falls back to the process-lifetime peak from getrusage."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss is KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+class RssSampler:
+    """Samples RSS on a background thread while the block runs, so each case reports
+    its own peak instead of the high-water mark of everything run before it."""
+
+    def __enter__(self):
+        self.start_mb = self.peak_mb = current_rss_mb()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def _sample(self):
+        while not self._stop.wait(RSS_SAMPLE_SECONDS):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+        return False
+
+def percentile(values, pct):
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+def summarize_runs(runs, items=1, audio=None):
+    durations, rss = runs
+    total = sum(durations)
+    result = {
+        "runs": len(durations),
+        "p50_seconds": round(percentile(durations, 50), 4),
+        "p95_seconds": round(percentile(durations, 95), 4),
+        "mean_seconds": round(statistics.mean(durations), 4),
+        "throughput_per_second": round(items * len(durations) / total, 3) if total else None,
+        "peak_rss_mb": rss.peak_mb,
+        "rss_growth_mb": round(rss.peak_mb - rss.start_mb, 1),
+    }
+    if audio:
+        result["real_time_factor"] = round(statistics.median(durations) / audio, 4)
+    return result
+
+def timed_runs(fn, repeat):
+    """(durations, RssSampler) for `repeat` calls of fn, as summarize_runs takes them."""
+    durations = []
+    with RssSampler() as rss:
+        for _ in range(repeat):
+            start = time.perf_counter()
+            fn()
+            durations.append(time.perf_counter() - start)
+    return durations, rss
+
+# =============================
+# STAGES
+# =============================
+
+def bench_download(fixtures, repeat, scratch):
+    results = {}
+    for path, label, seconds in fixtures:
+        url, server = streaming_pipeline.serve_file(path)
+        try:
+            def run():
+                workdir = tempfile.mkdtemp(dir=scratch)
+                if not app.download_audio(url, workdir):
+                    raise RuntimeError(f"download of {url} failed")
+            results[label] = summarize_runs(timed_runs(run, repeat), audio=seconds)
+        finally:
+            server.shutdown()
+    return results
+
+def bench_transcribe(fixtures, repeat, scratch):
+    results = {}
+    # Model load is reported separately
+    app.model_registry.get_model(app.WHISPER_MODEL_SIZE, **app.asr_engine_options())
+    results["model_load_seconds"] = app.model_registry.model_stats()[0]["load_seconds"]
+    preprocess = app.AUDIO_PREPROCESS
+    for path, label, seconds in fixtures:
+        stats = {}
+
+        def run():
+            workdir = tempfile.mkdtemp(dir=scratch)
+            app.transcribe_audio(path, None, workdir, stats)  # no URL, so the transcript cache is bypassed
+        results[label] = summarize_runs(timed_runs(run, repeat), audio=seconds)
+        if preprocess:
+            # The same fixture without trimming, for the speedup it buys
+            results[label]["removed_fraction"] = stats["removed_fraction"]
+            app.AUDIO_PREPROCESS = False
+            try:
+                baseline = summarize_runs(timed_runs(run, repeat), audio=seconds)
+            finally:
+                app.AUDIO_PREPROCESS = True
+            results[label]["untrimmed_p50_seconds"] = baseline["p50_seconds"]
+            results[label]["speedup_vs_untrimmed"] = round(baseline["p50_seconds"] / results[label]["p50_seconds"], 2)
+    return results
+
+def bench_summarize(repeat, scratch, transcript_words=(500, 5000, 30000)):
+    results = {}
+    for words in transcript_words:
+        text = " ".join(f"word{i % 97}." if i % 15 == 0 else f"word{i % 97}" for i in range(words))
+        for summary_type in app.SUMMARY_TYPES:
+            ttfts = []
+
+            def run():
+                # A fresh cache directory per run so every request reaches the fake server
+                summary_cache.CACHE_DIR = tempfile.mkdtemp(dir=scratch)
+                start = time.perf_counter()
+                for i, _ in enumerate(app.summarize_text_openai(text, summary_type, "English", stream=True)):
+                    if i == 0:
+                        ttfts.append(time.perf_counter() - start)
+
+            stats = summarize_runs(timed_runs(run, repeat))
+            stats["time_to_first_token_p50"] = round(percentile(ttfts, 50), 4)
+            results[f"{words}w_{summary_type}"] = stats
+    return results
+
+def bench_history(sizes, scratch):
+    results = {}
+    for size in sizes:
+        results[str(size)] = {
+            name: round(value, 4) if isinstance(value, float) else value
+            for name, value in history_store.benchmark(size, os.path.join(scratch, f"history_{size}.db")).items()
+        }
+    return results
+
+# =============================
+# RUNNER
+# =============================
+
+def compare(current, previous):
+    """Prints p50 changes for every stage present in both runs."""
+    for stage, cases in current["stages"].items():
+        for case, stats in cases.items():
+            before = previous.get("stages", {}).get(stage, {}).get(case)
+            if isinstance(stats, dict) and isinstance(before, dict) and "p50_seconds" in stats:
+                delta = (stats["p50_seconds"] - before["p50_seconds"]) / before["p50_seconds"] * 100
+                print(f"{stage:>10} {case:>28}: p50 {before['p50_seconds']:.4f}s -> {stats['p50_seconds']:.4f}s ({delta:+.1f}%)")
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline benchmark of the summarizer pipeline")
+    parser.add_argument("--stages", default="download,transcribe,summarize,history")
+    parser.add_argument("--fixtures", help="directory of audio files to use instead of synthetic ones")
+    parser.add_argument("--lengths", default=",".join(map(str, AUDIO_LENGTHS)))
+    parser.add_argument("--history-sizes", default=",".join(map(str, HISTORY_SIZES)))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--first-token-latency", type=float, default=0.3)
+    parser.add_argument("--token-latency", type=float, default=0.01)
+    parser.add_argument("--out", default=os.path.join("bench_results", time.strftime("%Y%m%d-%H%M%S") + ".json"))
+    parser.add_argument("--compare", help="previous results JSON to diff against")
+    args = parser.parse_args()
+
+    stages = set(args.stages.split(","))
+    scratch = tempfile.mkdtemp(prefix="bench_")
+    # Keep every cache and store out of the real working directory
+    transcript_cache.CACHE_DIR = os.path.join(scratch, "transcripts")
+    summary_cache.CACHE_DIR = os.path.join(scratch, "summaries")
+    history_store.HISTORY_DB = os.path.join(scratch, "history.db")
+
+    if args.fixtures:
+        fixtures = load_fixtures(args.fixtures)
+    else:
+        fixtures = build_fixtures(os.path.join("bench_results", "fixtures"),
+                                  [int(x) for x in args.lengths.split(",")])
+
+    fake_openai = FakeOpenAIServer(args.first_token_latency, args.token_latency)
+    # Through the same rate-limited, pooled client the app uses
+    app.client = llm_client.create_client("benchmark", fake_openai.base_url)
+
+    results = {
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+        "config": {
+            "whisper_model": app.WHISPER_MODEL_SIZE,
+            "asr_engine": app.ASR_ENGINE,
+            "asr_compute_type": app.ASR_COMPUTE_TYPE,
+            "ingest_mode": app.AUDIO_INGEST_MODE,
+            "audio_preprocess": app.AUDIO_PREPROCESS,
+            "repeat": args.repeat,
+            "first_token_latency": args.first_token_latency,
+            "token_latency": args.token_latency,
+        },
+        "stages": {},
+    }
+    try:
+        if "download" in stages:
+            results["stages"]["download"] = bench_download(fixtures, args.repeat, scratch)
+        if "transcribe" in stages:
+            results["stages"]["transcribe"] = bench_transcribe(fixtures, args.repeat, scratch)
+        if "summarize" in stages:
+            results["stages"]["summarize"] = bench_summarize(args.repeat, scratch)
+        if "history" in stages:
+            results["stages"]["history"] = bench_history([int(x) for x in args.history_sizes.split(",")], scratch)
+    finally:
+        fake_openai.shutdown()
+        shutil.rmtree(scratch, ignore_errors=True)
+
+    os.makedirs(os.path.dirname(args.out) or ".", exist_ok=True)
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=4)
+    print(json.dumps(results, indent=4))
+    print(f"Saved results to {args.out}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            compare(results, json.load(f))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+# YouTube caption tracks as transcripts
+# Many videos already carry human-made or auto-generated subtitles. Fetching one takes
+# a second, against a full audio download plus Whisper run, so the pipeline tries them
+# first. Tracks are listed with yt_dlp, chosen by a preference policy ("manual" before
+# "auto" by default), and VTT/SRT cues are parsed into the same {"start", "end", "text",
+# "words"} segments Whisper produces. YouTube's auto captions repeat every line in two
+# consecutive cues ("rolling" captions); in auto tracks a line already shown by the
+# previous cue is dropped, and their inline <00:00:01.234> word timings become
+# word-level timestamps. Manual tracks are taken as written.
+
+import re
+import html
+import time
+
+import requests
+
+# =============================
+# CONFIGURATION
+# =============================
+
+FORMATS = ["vtt", "srt"]  # in order of preference
+FETCH_TIMEOUT = 15
+
+_TIME = r"(?:(\d+):)?(\d{2}):(\d{2})[.,](\d{3})"
+_CUE_TIME = re.compile(rf"{_TIME}\s*-->\s*{_TIME}")
+_INLINE_TIME = re.compile(r"<(\d{2}:\d{2}:\d{2}\.\d{3})>")
+_TAG = re.compile(r"<[^>]+>")
+
+def _seconds(hours, minutes, seconds, millis):
+    return int(hours or 0) * 3600 + int(minutes) * 60 + int(seconds) + int(millis) / 1000
+
+def _clean(text):
+    return " ".join(html.unescape(_TAG.sub("", text)).split())
+
+# =============================
+# PARSERS
+# =============================
+
+def _cues(text):
+    """Yields (start, end, payload_lines) for every timed block of a VTT or SRT file."""
+    # Only truly empty lines end a cue: auto captions put lines holding a single space inside cues
+    for block in re.split(r"(?:\r?\n){2,}", text.strip()):
+        lines = block.splitlines()
+        for i, line in enumerate(lines):
+            match = _CUE_TIME.search(line)
+            if match:
+                groups = match.groups()
+                yield _seconds(*groups[:4]), _seconds(*groups[4:]), lines[i + 1:]
+                break
+
+def _words(line, start, end):
+    parts = _INLINE_TIME.split(line)  # text, time, text, time, text...
+    if len(parts) == 1:
+        return []
+    starts = [start] + [_seconds(*re.match(_TIME, t).groups()) for t in parts[1::2]]
+    words = []
+    for i, (word_start, raw) in enumerate(zip(starts, parts[0::2])):
+        word = _clean(raw)
+        if word:
+            word_end = starts[i + 1] if i + 1 < len(starts) else end
+            words.append({"word": " " + word, "start": round(word_start, 3), "end": round(word_end, 3)})
+    return words
+
+def parse_captions(text, rolling=False):
+    """VTT or SRT -> Whisper-style segments. rolling drops lines repeated from the
+    previous cue, as YouTube's auto captions do; a manual "Yes." / "No." / "Yes." stays."""
+    segments, previous = [], set()
+    for start, end, lines in _cues(text):
+        fresh, words, shown = [], [], set()
+        for line in lines:
+            clean = _clean(line)
+            if clean:
+                shown.add(clean)
+            if not clean or (rolling and clean in previous):
+                continue  # blank, or a line rolled over from the previous cue
+            fresh.append(clean)
+            words += _words(line, start, end)
+        previous = shown
+        if not fresh:
+            continue
+        segments.append({"start": round(start, 3), "end": round(end, 3),
+                         "text": " " + " ".join(fresh), "words": words})
+    return segments
+
+# =============================
+# TRACK SELECTION
+# =============================
+
+def list_tracks(video_url):
+    import yt_dlp
+    opts = {'skip_download': True, 'quiet': True, 'noplaylist': True,
+            'writesubtitles': True, 'writeautomaticsub': True}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        return ydl.extract_info(video_url, download=False)
+
+def choose_track(info, sources=("manual", "auto"), language=None):
+    """Returns (source, language, track) for the first source in `sources` with a usable
+    track in `language` (or the video's own language), else None."""
+    language = language or info.get("language")
+    for source in sources:
+        tracks = info.get("subtitles" if source == "manual" else "automatic_captions") or {}
+        tracks = {lang: formats for lang, formats in tracks.items() if lang != "live_chat"}
+        candidates = []
+        if language:
+            candidates += [f"{language}-orig", language]
+            candidates += [lang for lang in tracks if lang.split("-")[0] == language]
+        # Auto captions are offered machine-translated into every language; "-orig" is the real one
+        candidates += [lang for lang in tracks if lang.endswith("-orig")]
+        if source == "manual" and not language:
+            candidates += list(tracks)
+        for lang in candidates:
+            for ext in FORMATS:
+                track = next((t for t in tracks.get(lang, []) if t.get("ext") == ext), None)
+                if track:
+                    return source, lang.replace("-orig", ""), track
+    return None
+
+def fetch(video_url, sources=("manual", "auto"), language=None):
+    """Returns {"text", "segments", "language", "source", "duration", "fetch_seconds"} for
+    the preferred caption track, or None when no allowed track exists."""
+    start = time.perf_counter()
+    info = list_tracks(video_url)
+    choice = choose_track(info, sources, language)
+    if choice is None:
+        return None
+    source, lang, track = choice
+    response = requests.get(track["url"], timeout=FETCH_TIMEOUT)
+    response.raise_for_status()
+    segments = parse_captions(response.content.decode("utf-8", errors="replace"), rolling=source == "auto")
+    if not segments:
+        return None
+    return {
+        "text": "".join(s["text"] for s in segments),
+        "segments": segments,
+        "language": lang,
+        "source": source,
+        "duration": info.get("duration"),
+        "fetch_seconds": round(time.perf_counter() - start, 2),
+    }
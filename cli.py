@@ -0,0 +1,174 @@
+# Headless command-line entry point
+# Runs the same download -> transcribe -> summarize pipeline as the Streamlit app for a
+# single URL, a file of URLs or a whole playlist, without a browser:
+#
+#   python cli.py https://www.youtube.com/watch?v=...
+#   python cli.py --file urls.txt --formats "Paragraph,Bullet Points" --languages English,Hindi
+#   python cli.py --playlist https://www.youtube.com/playlist?list=... --out backfill.jsonl
+#
+# Every finished video is appended to the output JSONL straight away. That file doubles
+# as the checkpoint: re-running the same command skips videos already in it, so an
+# interrupted batch simply resumes.
+
+import os
+import json
+import logging
+import argparse
+import tempfile
+import threading
+from datetime import datetime
+
+import yt_dlp
+
+import app
+import jobs
+import transcript_cache
+import workspace
+
+# =============================
+# INPUTS
+# =============================
+
+def expand_playlist(playlist_url):
+    opts = {'extract_flat': 'in_playlist', 'quiet': True, 'skip_download': True}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(playlist_url, download=False)
+    urls = []
+    for entry in info.get("entries") or []:
+        url = entry.get("url") or entry.get("id")
+        if url and not url.startswith("http"):
+            url = f"https://www.youtube.com/watch?v={url}"
+        if url:
+            urls.append(url)
+    return urls
+
+def collect_urls(args):
+    urls = list(args.urls)
+    if args.file:
+        with open(args.file, "r", encoding="utf-8") as f:
+            urls += [line.strip() for line in f if line.strip() and not line.startswith("#")]
+    for playlist in args.playlist or []:
+        urls += expand_playlist(playlist)
+    # De-duplicate by video ID, keeping the first spelling of each URL
+    seen, unique = set(), []
+    for url in urls:
+        video_id = transcript_cache.extract_video_id(url)
+        if video_id not in seen:
+            seen.add(video_id)
+            unique.append(url)
+    return unique
+
+def load_checkpoint(out_path):
+    done = set()
+    if not os.path.exists(out_path):
+        return done
+    with open(out_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                done.add(json.loads(line)["video_id"])
+            except (ValueError, KeyError):
+                continue  # a line cut short by an interrupted run
+    return done
+
+# =============================
+# PIPELINE
+# =============================
+
+def run_batch(urls, summary_types, languages, out_path, concurrency, save_history=False):
+    write_lock = threading.Lock()
+
+    def summarize_stage(job):
+        text = job["result"]["transcript"]
+        cached = app.get_cached_transcript(job["video_url"])
+        segments = cached["segments"] if cached and cached["text"] == text else None
+        report = {}
+        if len(summary_types) * len(languages) > 1:
+            summaries = list(app.summarize_batch(text, summary_types, languages, segments, report))
+        else:
+            summaries = [(summary_types[0], languages[0],
+                          app.summarize_text_openai(text, summary_types[0], languages[0], segments, report=report))]
+        record = {
+            "video_url": job["video_url"],
+            "video_id": transcript_cache.extract_video_id(job["video_url"]),
+            "transcript": text,
+            "segments": segments.to_segments() if segments else None,
+            "summaries": [
+                {"summary_type": t, "language": l, "summary": s} for t, l, s in summaries
+            ],
+            "compaction": app.compaction_result(report) or None,
+            "timestamp": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        }
+        with write_lock, open(out_path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        if save_history:
+            for t, l, s in summaries:
+                app.save_history({"video_url": job["video_url"], "summary_type": t, "language": l,
+                                  "summary": s, "timestamp": record["timestamp"]})
+        # Backfills run thousands of videos; do not wait for the age-based sweep
+        workspace.remove_workspace(job["workdir"])
+        return {"summaries": len(summaries), **app.compaction_result(report)}
+
+    db_path = os.path.join(tempfile.mkdtemp(prefix="cli_jobs_"), "jobs.db")
+    queue = jobs.JobQueue(
+        {"download": app.run_download_stage, "transcribe": app.run_transcribe_stage, "summarize": summarize_stage},
+        db_path=db_path,
+        concurrency=concurrency,
+    )
+    job_ids = queue.submit_many(urls, summary_types[0], languages[0])
+    queue.wait()
+    queue.shutdown()
+    return queue.list_jobs(job_ids)
+
+# =============================
+# ENTRY POINT
+# =============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Summarize YouTube videos without the Streamlit UI")
+    parser.add_argument("urls", nargs="*", help="YouTube video URLs")
+    parser.add_argument("--file", help="text file with one URL per line")
+    parser.add_argument("--playlist", action="append", help="playlist URL (may be repeated)")
+    parser.add_argument("--formats", default="Paragraph", help=f"comma-separated, from: {', '.join(app.SUMMARY_TYPES)}")
+    parser.add_argument("--languages", default="English", help="comma-separated output languages")
+    parser.add_argument("--out", default="summaries.jsonl", help="results JSONL, also used as the resume checkpoint")
+    parser.add_argument("--download-workers", type=int, default=jobs.DEFAULT_CONCURRENCY["download"])
+    parser.add_argument("--transcribe-workers", type=int,
+                        help="processes per transcription; videos still transcribe one at a time on the shared model")
+    parser.add_argument("--summarize-workers", type=int, default=jobs.DEFAULT_CONCURRENCY["summarize"])
+    parser.add_argument("--save-history", action="store_true", help="also add the summaries to the app's history")
+    args = parser.parse_args(argv)
+
+    if args.transcribe_workers is not None:
+        app.WHISPER_PARALLEL_WORKERS = args.transcribe_workers
+
+    # The pipeline's st.info/st.warning calls have no page to render to here
+    logging.getLogger("streamlit").setLevel(logging.ERROR)
+
+    summary_types = [t.strip() for t in args.formats.split(",") if t.strip()]
+    unknown = [t for t in summary_types if t not in app.SUMMARY_TYPES]
+    if unknown:
+        parser.error(f"unknown format(s): {', '.join(unknown)}")
+    languages = [l.strip() for l in args.languages.split(",") if l.strip()]
+
+    urls = collect_urls(args)
+    if not urls:
+        parser.error("no URLs given")
+    done = load_checkpoint(args.out)
+    pending = [u for u in urls if transcript_cache.extract_video_id(u) not in done]
+    print(f"{len(urls)} videos, {len(urls) - len(pending)} already done, {len(pending)} to process")
+    if not pending:
+        return 0
+
+    results = run_batch(
+        pending, summary_types, languages, args.out,
+        {"download": args.download_workers, "summarize": args.summarize_workers},
+        save_history=args.save_history,
+    )
+    failed = [job for job in results if job["status"] != "done"]
+    for job in failed:
+        print(f"FAILED {job['video_url']}: {job['error']}")
+    print(f"Finished: {len(results) - len(failed)} succeeded, {len(failed)} failed. Results in {args.out}")
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,234 @@
+# Transcript compaction
+# Whisper transcripts carry filler ("um", "uh"), stutters, non-speech tags ("[Music]")
+# and, on long silences, hallucinated loops where one phrase or sentence repeats dozens
+# of times. Filler words are English ("um" is a German preposition and a Portuguese
+# article), so they are only dropped from English transcripts, and only words repeated
+# three or more times count as a stutter ("had had" and "2 2 rows" are real content). All of it costs prompt tokens and none of it helps a summary. Before a
+# transcript is summarized it is cleaned, its segments are merged back into sentences,
+# and when it is still over the token budget for the requested format the most
+# informative sentences are kept: TF-IDF sentence vectors ranked with TextRank, all in
+# NumPy on the sparse (row, column, value) triplets so no sentence x sentence matrix is
+# ever built. Kept sentences stay in their original order.
+# Ranking only trims transcripts that would otherwise go out in a single prompt. Past
+# the summarizer's map-reduce threshold the cleaned transcript is kept whole and
+# chunked, so long lectures are summarized in full rather than by a few sentences.
+# Run `python compaction.py transcript.txt` to see what a budget does to a transcript.
+
+import re
+import argparse
+
+import numpy as np
+
+import metrics
+from summarizer import SUMMARY_MODEL, MAP_REDUCE_THRESHOLD_TOKENS, count_tokens
+
+# =============================
+# CONFIGURATION
+# =============================
+
+# Transcript tokens allowed into a single summary prompt, per format; None keeps everything.
+# Bullet points try to cover every topic, so they get the most room. Transcripts longer
+# than rank_limit (the map-reduce threshold) are not ranked down to these.
+TOKEN_BUDGETS = {"Paragraph": 8000, "Bullet Points": 12000, "Conversational": 6000}
+DEFAULT_TOKEN_BUDGET = 8000
+REPEAT_WINDOW = 10  # a sentence repeating one of the last N sentences is dropped
+MAX_SENTENCE_WORDS = 60  # unpunctuated transcripts are cut into pieces this long
+ENGLISH_SAMPLE_WORDS = 500
+ENGLISH_STOPWORD_SHARE = 0.25  # English speech is ~40% stopwords; other languages hit few of them
+DAMPING = 0.85
+ITERATIONS = 50
+
+_FILLER = re.compile(r"\b(?:u+m+|u+h+|e+r+m+|e+r|a+h+|h+m+|m+h*m+)\b[,.]?\s*", re.IGNORECASE)
+_ASIDE = re.compile(r",\s*(?:you know|I mean)\s*,", re.IGNORECASE)
+_NON_SPEECH = re.compile(r"\[[^\]]*\]|\([^)]*(?:music|applause|laughter|inaudible)[^)]*\)|♪+", re.IGNORECASE)
+_STUTTER = re.compile(r"\b([^\W\d]+)(?:\s+\1\b){2,}", re.IGNORECASE)
+_PHRASE_LOOP = re.compile(r"\b([^\W\d]\w*\W+(?:\w+\W+){0,7}?)\1{2,}", re.IGNORECASE)  # not "2 2 2 rows"
+_SENTENCE_END = re.compile(r"(?<=[.!?。！？])\s+")
+_WORD = re.compile(r"\w+")
+_NORMALIZE = re.compile(r"\W+")
+
+STOPWORDS = frozenset("""
+a about above after again all also am an and any are as at be because been before being
+both but by can could did do does doing down during each few for from further had has have
+having he her here hers him his how i if in into is it its itself just me more most my no
+nor not now of off on once only or other our ours out over own really right same she should
+so some such than that the their theirs them then there these they this those through to too
+under until up very was we well were what when where which while who whom why will with would
+yeah yes you your yours okay ok oh like gonna wanna kind sort thing things going get got
+""".split())
+
+def budget_for(summary_type):
+    return TOKEN_BUDGETS.get(summary_type, DEFAULT_TOKEN_BUDGET)
+
+# =============================
+# CLEANING
+# =============================
+
+def is_english(text, language=None):
+    """language is a Whisper code or name; without one, guessed from the share of English stopwords."""
+    if language:
+        return language.lower() in ("en", "english")
+    words = _WORD.findall(text[:ENGLISH_SAMPLE_WORDS * 8].lower())[:ENGLISH_SAMPLE_WORDS]
+    return bool(words) and sum(w in STOPWORDS for w in words) / len(words) >= ENGLISH_STOPWORD_SHARE
+
+def clean(text, english=True):
+    """Drops non-speech tags, stutters and phrase loops inside a sentence, and for English
+    transcripts filler words."""
+    text = _NON_SPEECH.sub(" ", text)
+    if english:
+        text = _ASIDE.sub(" ", text)
+        text = _FILLER.sub("", text)
+    text = _PHRASE_LOOP.sub(r"\1", text)
+    text = _STUTTER.sub(r"\1", text)
+    text = re.sub(r"\s+([,.!?])", r"\1", text)
+    text = re.sub(r"([,.!?])(?:\s*[,.])+", r"\1", text)  # punctuation left behind by removed filler
+    return " ".join(text.split()).strip(" ,")
+
+def split_sentences(text, segments=None):
+    """Merges Whisper segments (which often break mid-sentence) back into sentences."""
+    if segments:
+        text = " ".join(s["text"].strip() for s in segments)
+    sentences = []
+    for sentence in _SENTENCE_END.split(text):
+        words = sentence.split()
+        for i in range(0, len(words), MAX_SENTENCE_WORDS):
+            sentences.append(" ".join(words[i:i + MAX_SENTENCE_WORDS]))
+    return [s for s in sentences if s]
+
+def drop_repeats(sentences, window=REPEAT_WINDOW):
+    """Removes sentences that repeat one of the previous `window` sentences verbatim
+    (ignoring case and punctuation): the shape of a Whisper hallucination loop."""
+    kept, recent = [], []
+    for sentence in sentences:
+        key = _NORMALIZE.sub(" ", sentence.lower()).strip()
+        if not key or key in recent:
+            continue
+        kept.append(sentence)
+        recent = (recent + [key])[-window:]
+    return kept
+
+# =============================
+# EXTRACTIVE RANKING
+# =============================
+
+def tfidf(sentences):
+    """Sparse, L2-normalized TF-IDF rows as (rows, cols, values, n_terms)."""
+    vocab, rows, cols = {}, [], []
+    for i, sentence in enumerate(sentences):
+        for word in _WORD.findall(sentence.lower()):
+            if word not in STOPWORDS and not word.isdigit():
+                rows.append(i)
+                cols.append(vocab.setdefault(word, len(vocab)))
+    n, n_terms = len(sentences), max(1, len(vocab))
+    pairs, tf = np.unique(np.array(rows, dtype=np.int64) * n_terms + np.array(cols, dtype=np.int64),
+                          return_counts=True)
+    rows, cols = pairs // n_terms, pairs % n_terms
+    df = np.bincount(cols, minlength=n_terms)
+    values = (1 + np.log(tf)) * (np.log((1 + n) / (1 + df)) + 1)[cols]
+    norms = np.sqrt(np.bincount(rows, weights=values ** 2, minlength=n))
+    return rows, cols, values / norms[rows], n_terms
+
+def textrank(sentences, damping=DAMPING, iterations=ITERATIONS, tol=1e-6):
+    """TextRank scores over cosine similarity of TF-IDF vectors. S @ x is computed as
+    X @ (X.T @ x) on the sparse triplets, so memory stays linear in the transcript."""
+    n = len(sentences)
+    if n == 0:
+        return np.zeros(0)
+    rows, cols, values, n_terms = tfidf(sentences)
+    self_similarity = np.bincount(rows, weights=values ** 2, minlength=n)  # 1, or 0 for empty rows
+
+    def similarity_dot(x):
+        per_term = np.bincount(cols, weights=values * x[rows], minlength=n_terms)
+        return np.bincount(rows, weights=values * per_term[cols], minlength=n) - self_similarity * x
+
+    degree = similarity_dot(np.ones(n))
+    inverse_degree = np.divide(1.0, degree, out=np.zeros(n), where=degree > 1e-12)
+    scores = np.full(n, 1.0 / n)
+    for _ in range(iterations):
+        updated = (1 - damping) / n + damping * similarity_dot(scores * inverse_degree)
+        converged = np.abs(updated - scores).sum() < tol
+        scores = updated
+        if converged:
+            break
+    return scores
+
+def select(scores, tokens, budget):
+    """Highest-scoring sentences that fit in `budget` tokens, as a boolean mask."""
+    keep = np.zeros(len(scores), dtype=bool)
+    used = 0
+    for i in np.argsort(-scores, kind="stable"):
+        if used + tokens[i] <= budget:
+            keep[i] = True
+            used += tokens[i]
+    return keep
+
+# =============================
+# COMPACTION
+# =============================
+
+def compact(text, segments=None, budget=None, model=SUMMARY_MODEL, rank_limit=MAP_REDUCE_THRESHOLD_TOKENS,
+            language=None):
+    """Returns (compacted_text, stats). The transcript is always cleaned; when it is over
+    the budget but not over rank_limit, sentences are ranked and the best ones kept, in
+    order. Over rank_limit it is left for the summarizer's map-reduce pass. language
+    defaults to the segments' own."""
+    original_tokens = count_tokens(text, model)
+    english = is_english(text, language or getattr(segments, "language", None))
+    sentences = [clean(s, english) for s in split_sentences(text, segments)]
+    sentences = [s for s in sentences if s]
+    total = len(sentences)
+    sentences = drop_repeats(sentences)
+    repeats_removed = total - len(sentences)
+
+    result = " ".join(sentences)
+    kept = len(sentences)
+    ranked = False
+    cleaned_tokens = count_tokens(result, model)
+    if budget is not None and budget < cleaned_tokens and (rank_limit is None or cleaned_tokens <= rank_limit):
+        tokens = np.array([count_tokens(s, model) + 1 for s in sentences])
+        keep = select(textrank(sentences), tokens, budget)
+        # A paragraph break marks every place where sentences were left out
+        parts, previous = [], -1
+        for i in np.flatnonzero(keep):
+            parts.append(("\n\n" if parts and i != previous + 1 else " ") + sentences[i])
+            previous = i
+        result = "".join(parts).strip()
+        kept = int(keep.sum())
+        ranked = True
+
+    compacted_tokens = count_tokens(result, model) if result else 0
+    stats = {
+        "original_tokens": original_tokens,
+        "compacted_tokens": compacted_tokens,
+        "tokens_saved": original_tokens - compacted_tokens,
+        "compression_ratio": round(original_tokens / max(1, compacted_tokens), 2),
+        "sentences": total,
+        "sentences_kept": kept,
+        "repeats_removed": repeats_removed,
+        "ranked": ranked,
+        "filler_removed": english,
+    }
+    metrics.inc("transcript_tokens_saved_total", stats["tokens_saved"])
+    metrics.observe("transcript_compression_ratio", stats["compression_ratio"])
+    return result, stats
+
+if __name__ == "__main__":
+    import time
+
+    parser = argparse.ArgumentParser(description="Compact a transcript to a summary format's token budget")
+    parser.add_argument("transcript", help="transcript.txt")
+    parser.add_argument("--format", default="Paragraph", choices=list(TOKEN_BUDGETS))
+    parser.add_argument("--budget", type=int, help="override the format's token budget")
+    parser.add_argument("--language", help="transcript language (default: guessed)")
+    parser.add_argument("--show", action="store_true", help="print the compacted transcript")
+    args = parser.parse_args()
+
+    with open(args.transcript, "r", encoding="utf-8") as f:
+        source = f.read()
+    start = time.perf_counter()
+    compacted, stats = compact(source, budget=args.budget or budget_for(args.format), language=args.language)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    for name, value in stats.items():
+        print(f"{name:>18}: {value}")
+    if args.show:
+        print("\n" + compacted)
@@ -0,0 +1,386 @@
+# Audio download engine
+# Resolves the audio stream with yt_dlp (and, hedged, with pytube when yt_dlp stalls or
+# fails), then fetches it itself: fixed-size HTTP range fragments downloaded concurrently,
+# each resumable from its .part file, retried with exponential backoff and full jitter.
+# Stalls surface as read timeouts and resets as connection errors; both just retry the
+# fragment from where it stopped. The winner is moved to a deterministic path.
+# Workspaces are shared across videos, so every file a source writes is named after the
+# video ID (and parts after the content length too), and losing or failed sources
+# delete theirs: a fragment is never resumed into another video's audio.
+# Run `python downloader.py --selftest` to exercise it against a local flaky server.
+
+import os
+import sys
+import glob
+import time
+import queue
+import random
+import shutil
+import hashlib
+import argparse
+import functools
+import threading
+import subprocess
+from concurrent.futures import ThreadPoolExecutor
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import requests
+
+import metrics
+import transcript_cache
+
+# =============================
+# CONFIGURATION
+# =============================
+
+FRAGMENT_BYTES = 4 * 1024 * 1024  # YouTube throttles long single-range reads
+FRAGMENT_WORKERS = 4
+FRAGMENT_RETRIES = 6
+CONNECT_TIMEOUT = 10
+STALL_TIMEOUT = 15  # no bytes for this long counts as a stall
+BACKOFF_BASE = 0.5
+BACKOFF_CAP = 20
+HEDGE_AFTER_SECONDS = 8  # start the next source if the running ones make no progress for this long
+CHUNK_BYTES = 64 * 1024
+
+class DownloadCancelled(Exception):
+    pass
+
+class DownloadFailed(Exception):
+    pass
+
+# =============================
+# BACKOFF
+# =============================
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    """Full jitter: uniform in [0, min(cap, base * 2**attempt)]."""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def _sleep(seconds, cancel):
+    if cancel is not None and cancel.wait(seconds):
+        raise DownloadCancelled()
+    if cancel is None:
+        time.sleep(seconds)
+
+# =============================
+# HTTP FETCH
+# =============================
+
+def probe(url, headers=None):
+    """Returns (total_bytes or None, supports_ranges)."""
+    with requests.get(url, headers={**(headers or {}), "Range": "bytes=0-0"},
+                      stream=True, timeout=(CONNECT_TIMEOUT, STALL_TIMEOUT)) as r:
+        r.raise_for_status()
+        content_range = r.headers.get("Content-Range", "")
+        if r.status_code == 206 and "/" in content_range and not content_range.endswith("/*"):
+            return int(content_range.rsplit("/", 1)[1]), True
+        length = r.headers.get("Content-Length")
+        return (int(length) if length else None), False
+
+class Progress:
+    """When a download last moved: resolved its URL or received bytes."""
+
+    def __init__(self):
+        self.last = time.monotonic()
+
+    def touch(self, *_):
+        self.last = time.monotonic()
+
+    def idle_seconds(self):
+        return time.monotonic() - self.last
+
+def _fetch_range(url, headers, part_path, start, end, cancel, on_progress=None):
+    expected = end - start + 1
+    for attempt in range(FRAGMENT_RETRIES):
+        have = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+        if have == expected:
+            return
+        if have > expected:
+            os.remove(part_path)  # not this fragment's bytes: start it over
+            have = 0
+        try:
+            with requests.get(url, headers={**headers, "Range": f"bytes={start + have}-{end}"},
+                              stream=True, timeout=(CONNECT_TIMEOUT, STALL_TIMEOUT)) as r:
+                if r.status_code != 206:
+                    raise requests.HTTPError(f"range request answered with HTTP {r.status_code}")
+                with open(part_path, "ab") as f:
+                    for chunk in r.iter_content(CHUNK_BYTES):
+                        if cancel is not None and cancel.is_set():
+                            raise DownloadCancelled()
+                        f.write(chunk)
+                        if on_progress is not None:
+                            on_progress(len(chunk))
+            if os.path.getsize(part_path) >= expected:
+                return
+            reason = "short_read"
+        except requests.RequestException as e:
+            reason = type(e).__name__
+        metrics.inc("download_retries_total", reason=reason)
+        _sleep(backoff_delay(attempt), cancel)
+    raise DownloadFailed(f"fragment {start}-{end} failed after {FRAGMENT_RETRIES} attempts")
+
+def _fetch_whole(url, headers, path, cancel, on_progress=None):
+    # No range support: every retry has to start over
+    for attempt in range(FRAGMENT_RETRIES):
+        try:
+            with requests.get(url, headers=headers, stream=True,
+                              timeout=(CONNECT_TIMEOUT, STALL_TIMEOUT)) as r:
+                r.raise_for_status()
+                with open(path, "wb") as f:
+                    for chunk in r.iter_content(CHUNK_BYTES):
+                        if cancel is not None and cancel.is_set():
+                            raise DownloadCancelled()
+                        f.write(chunk)
+                        if on_progress is not None:
+                            on_progress(len(chunk))
+            return
+        except requests.RequestException as e:
+            metrics.inc("download_retries_total", reason=type(e).__name__)
+            _sleep(backoff_delay(attempt), cancel)
+    raise DownloadFailed(f"download of {url} failed after {FRAGMENT_RETRIES} attempts")
+
+def fetch(url, path, headers=None, cancel=None, fragment_bytes=FRAGMENT_BYTES, workers=FRAGMENT_WORKERS,
+          max_bytes=None, on_progress=None):
+    """Downloads url to path, resuming any .part files an earlier attempt left for the same
+    path and content length. on_progress(n_bytes) is called from the fetching threads
+    as data arrives."""
+    headers = headers or {}
+    total, ranged = probe(url, headers)
+    if max_bytes and total and total > max_bytes:
+        raise DownloadFailed(f"{total / 1e6:.0f} MB is over the {max_bytes / 1e6:.0f} MB limit")
+    if not ranged or not total:
+        _fetch_whole(url, headers, path + ".part", cancel, on_progress)
+        os.replace(path + ".part", path)
+        return os.path.getsize(path)
+
+    ranges = [(start, min(start + fragment_bytes, total) - 1) for start in range(0, total, fragment_bytes)]
+    parts = [f"{path}.{total}.part{i}" for i in range(len(ranges))]
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = [
+            pool.submit(_fetch_range, url, headers, part, start, end, cancel, on_progress)
+            for part, (start, end) in zip(parts, ranges)
+        ]
+        for future in futures:
+            future.result()
+
+    with open(path + ".part", "wb") as out:
+        for part in parts:
+            with open(part, "rb") as f:
+                shutil.copyfileobj(f, out)
+    os.replace(path + ".part", path)
+    for part in parts:
+        os.remove(part)
+    return total
+
+# =============================
+# SOURCES
+# =============================
+
+def resolve_yt_dlp(video_url):
+    import yt_dlp
+    opts = {'format': 'bestaudio/best', 'noplaylist': True, 'quiet': True, 'nocheckcertificate': True}
+    with yt_dlp.YoutubeDL(opts) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+    return info["url"], info.get("ext") or "m4a", info.get("http_headers") or {}
+
+def resolve_pytube(video_url):
+    from pytube import YouTube
+    stream = YouTube(video_url).streams.filter(only_audio=True).order_by("abr").desc().first()
+    return stream.url, stream.subtype, {}
+
+SOURCES = [("yt_dlp", resolve_yt_dlp), ("pytube", resolve_pytube)]
+
+def canonical_url(video_url):
+    # Only YouTube links are rewritten; splitting on "?" would drop the v= of watch URLs
+    video_id = transcript_cache.extract_video_id(video_url)
+    if video_id in video_url:
+        return f"https://www.youtube.com/watch?v={video_id}"
+    return video_url
+
+def _source_prefix(workdir, name, video_url):
+    return os.path.join(workdir, f".{name}.{transcript_cache.extract_video_id(video_url)}")
+
+def _discard(prefix):
+    """Deletes a source's download and any fragments it left."""
+    for path in glob.glob(glob.escape(prefix) + ".*"):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+def _run_source(name, resolver, video_url, workdir, cancel, results, max_bytes, progress):
+    start = time.perf_counter()
+    prefix = _source_prefix(workdir, name, video_url)
+    try:
+        url, ext, headers = resolver(video_url)
+        progress.touch()
+        path = f"{prefix}.{ext}"
+        size = fetch(url, path, headers, cancel, max_bytes=max_bytes, on_progress=progress.touch)
+        if cancel.is_set():
+            raise DownloadCancelled()  # finished just after another source won
+        results.put((name, path, ext, size, time.perf_counter() - start, None))
+    except Exception as e:
+        _discard(prefix)
+        results.put((name, None, None, 0, time.perf_counter() - start, e))
+
+def download_hedged(video_url, workdir, hedge_after=HEDGE_AFTER_SECONDS, sources=None, max_bytes=None):
+    """Races the sources: the next one starts when the previous fails, or when no running
+    source has resolved its URL or received a byte for hedge_after seconds. A long download
+    that keeps moving is never duplicated. Returns (source_name, path, ext, bytes, seconds)."""
+    sources = sources or SOURCES
+    results = queue.Queue()
+    cancels = []
+    started = []
+    running = {}  # name -> Progress
+    errors = []
+    next_source = 0
+
+    def start_next():
+        nonlocal next_source
+        name, resolver = sources[next_source]
+        next_source += 1
+        started.append(name)
+        cancel = threading.Event()
+        cancels.append(cancel)
+        running[name] = Progress()
+        threading.Thread(target=_run_source,
+                         args=(name, resolver, video_url, workdir, cancel, results, max_bytes, running[name]),
+                         daemon=True).start()
+
+    start_next()
+    while running:
+        timeout = None
+        if next_source < len(sources):
+            idle = min(p.idle_seconds() for p in running.values())
+            timeout = max(0.0, hedge_after - idle)
+        try:
+            name, path, ext, size, seconds, error = results.get(timeout=timeout)
+        except queue.Empty:
+            # Bytes may have arrived while we waited; only a real stall starts the next source
+            if min(p.idle_seconds() for p in running.values()) >= hedge_after:
+                metrics.inc("download_hedges_total")
+                start_next()
+            continue
+        running.pop(name, None)
+        if error is None:
+            for cancel in cancels:
+                cancel.set()  # the losers stop at their next chunk and delete their files
+            for loser in started:
+                if loser != name:
+                    _discard(_source_prefix(workdir, loser, video_url))
+            return name, path, ext, size, seconds
+        errors.append(f"{name}: {error}")
+        if next_source < len(sources):
+            start_next()
+    raise DownloadFailed("; ".join(errors))
+
+# =============================
+# TRANSCODE
+# =============================
+
+def transcode(src, dst, ingest_mode="pcm16k"):
+    args = ["-ar", "16000", "-ac", "1"] if ingest_mode == "pcm16k" else []
+    subprocess.run(
+        [shutil.which("ffmpeg") or "ffmpeg", "-nostdin", "-loglevel", "error", "-y", "-i", src, *args, dst],
+        check=True,
+    )
+
+def download(video_url, workdir, ingest_mode="pcm16k", stats=None, max_bytes=None):
+    """Downloads the audio of video_url into workdir and returns its deterministic path:
+    audio.wav for the "pcm16k" and "wav" modes, audio.<ext> for "native"."""
+    stats = stats if stats is not None else {}
+    name, path, ext, size, seconds = download_hedged(video_url, workdir, max_bytes=max_bytes)
+    stats.update({"source": name, "download_bytes": size, "download_seconds": round(seconds, 2)})
+    if ingest_mode == "native":
+        final = os.path.join(workdir, f"audio.{ext}")
+        os.replace(path, final)
+        return final
+    final = os.path.join(workdir, "audio.wav")
+    start = time.perf_counter()
+    transcode(path, final, ingest_mode)
+    stats["transcode_seconds"] = round(time.perf_counter() - start, 2)
+    os.remove(path)
+    return final
+
+# =============================
+# SELF-TEST (local flaky server)
+# =============================
+
+def serve_flaky(directory, stall_every=5, reset_every=7, stall_seconds=STALL_TIMEOUT + 2):
+    """Serves directory with Range support, stalling or resetting every Nth request."""
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class FlakyHandler(SimpleHTTPRequestHandler):
+        def log_message(self, *args):
+            pass
+
+        def do_GET(self):
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+            path = self.translate_path(self.path)
+            if not os.path.isfile(path):
+                self.send_error(404)
+                return
+            size = os.path.getsize(path)
+            start, end = 0, size - 1
+            header = self.headers.get("Range")
+            if header:
+                first, _, last = header.split("=", 1)[1].partition("-")
+                start, end = int(first), min(int(last) if last else size - 1, size - 1)
+            self.send_response(206 if header else 200)
+            self.send_header("Accept-Ranges", "bytes")
+            self.send_header("Content-Length", str(end - start + 1))
+            if header:
+                self.send_header("Content-Range", f"bytes {start}-{end}/{size}")
+            self.end_headers()
+            with open(path, "rb") as f:
+                f.seek(start)
+                body = f.read(end - start + 1)
+            if n > 1 and n % reset_every == 0:
+                self.wfile.write(body[: len(body) // 2])
+                self.connection.close()  # reset mid-body
+                return
+            if n > 1 and n % stall_every == 0:
+                self.wfile.write(body[: len(body) // 3])
+                self.wfile.flush()
+                time.sleep(stall_seconds)  # stall past the client's read timeout
+                return
+            self.wfile.write(body)
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), functools.partial(FlakyHandler, directory=directory))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}", server
+
+def selftest(size_mb=6):
+    global STALL_TIMEOUT
+    STALL_TIMEOUT = 2
+    import tempfile
+    directory = tempfile.mkdtemp(prefix="dl_selftest_")
+    source = os.path.join(directory, "source.bin")
+    with open(source, "wb") as f:
+        f.write(os.urandom(size_mb * 1024 * 1024))
+    base_url, server = serve_flaky(directory, stall_seconds=3)
+    try:
+        target = os.path.join(directory, "copy.bin")
+        start = time.perf_counter()
+        fetch(f"{base_url}/source.bin", target, fragment_bytes=512 * 1024)
+        elapsed = time.perf_counter() - start
+        same = hashlib.sha256(open(source, "rb").read()).digest() == hashlib.sha256(open(target, "rb").read()).digest()
+        print(f"downloaded {size_mb} MB through stalls/resets in {elapsed:.1f}s, intact: {same}")
+        return same
+    finally:
+        server.shutdown()
+        shutil.rmtree(directory, ignore_errors=True)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Audio download engine")
+    parser.add_argument("--selftest", action="store_true", help="download through a local flaky server")
+    parser.add_argument("url", nargs="?")
+    parser.add_argument("--out", default=".")
+    args = parser.parse_args()
+    if args.selftest:
+        sys.exit(0 if selftest() else 1)
+    print(download(args.url, args.out))
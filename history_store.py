@@ -0,0 +1,337 @@
+# Indexed summary history store
+# SQLite in WAL mode: O(1) appends, newest-first pages straight off the primary key,
+# and indexed filters by language, summary type and video URL. Replaces rewriting the
+# whole history.json on every save. Run `python history_store.py` for a benchmark.
+# Summaries and cached transcripts are also kept in FTS5 full-text indexes, updated
+# by triggers on every write, for ranked search with highlighted snippets.
+# A one-row history_meta table, also kept by triggers, holds the entry count and a
+# version bumped on every write, so readers can cache pages until something changes.
+
+import os
+import json
+import time
+import random
+import sqlite3
+import threading
+
+import metrics
+
+# =============================
+# CONFIGURATION
+# =============================
+
+HISTORY_DB = "history.db"
+FIELDS = ["video_url", "summary_type", "language", "summary", "timestamp"]
+PREVIEW_CHARS = 300
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS history (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_url TEXT NOT NULL,
+    summary_type TEXT NOT NULL,
+    language TEXT NOT NULL,
+    summary TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS history_language ON history (language, id);
+CREATE INDEX IF NOT EXISTS history_summary_type ON history (summary_type, id);
+CREATE INDEX IF NOT EXISTS history_video_url ON history (video_url, id);
+
+CREATE VIRTUAL TABLE IF NOT EXISTS history_fts USING fts5(
+    summary, video_url, content='history', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS history_fts_insert AFTER INSERT ON history BEGIN
+    INSERT INTO history_fts (rowid, summary, video_url) VALUES (new.id, new.summary, new.video_url);
+END;
+CREATE TRIGGER IF NOT EXISTS history_fts_delete AFTER DELETE ON history BEGIN
+    INSERT INTO history_fts (history_fts, rowid, summary, video_url)
+    VALUES ('delete', old.id, old.summary, old.video_url);
+END;
+
+CREATE TABLE IF NOT EXISTS history_meta (
+    id INTEGER PRIMARY KEY CHECK (id = 0),
+    version INTEGER NOT NULL,
+    entries INTEGER NOT NULL
+);
+INSERT OR IGNORE INTO history_meta (id, version, entries) VALUES (0, 0, 0);
+CREATE TRIGGER IF NOT EXISTS history_meta_insert AFTER INSERT ON history BEGIN
+    UPDATE history_meta SET version = version + 1, entries = entries + 1 WHERE id = 0;
+END;
+CREATE TRIGGER IF NOT EXISTS history_meta_delete AFTER DELETE ON history BEGIN
+    UPDATE history_meta SET version = version + 1, entries = entries - 1 WHERE id = 0;
+END;
+
+CREATE TABLE IF NOT EXISTS transcripts (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    video_id TEXT NOT NULL UNIQUE,
+    video_url TEXT NOT NULL,
+    language TEXT,
+    text TEXT NOT NULL,
+    timestamp TEXT NOT NULL
+);
+CREATE VIRTUAL TABLE IF NOT EXISTS transcripts_fts USING fts5(
+    text, content='transcripts', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+);
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_insert AFTER INSERT ON transcripts BEGIN
+    INSERT INTO transcripts_fts (rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS transcripts_fts_delete AFTER DELETE ON transcripts BEGIN
+    INSERT INTO transcripts_fts (transcripts_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+SCHEMA_VERSION = 3  # 1: full-text indexes, 2: history_meta, 3: cached transcripts indexed
+
+_local = threading.local()
+
+# =============================
+# CONNECTION
+# =============================
+
+def _connect(db_path=None):
+    db_path = db_path or HISTORY_DB
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(db_path)
+    if conn is None:
+        conn = sqlite3.connect(db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.executescript(_SCHEMA)
+        schema_version = conn.execute("PRAGMA user_version").fetchone()[0]
+        if schema_version < SCHEMA_VERSION:
+            with conn:
+                if schema_version < 1:
+                    # Databases from before the full-text index: index the rows they already hold
+                    conn.execute("INSERT INTO history_fts (history_fts) VALUES ('rebuild')")
+                if schema_version < 2:
+                    conn.execute("UPDATE history_meta SET entries = (SELECT COUNT(*) FROM history) WHERE id = 0")
+                if schema_version < 3:
+                    _backfill_transcripts(conn)
+                conn.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        conns[db_path] = conn
+    return conn
+
+def _where(language=None, summary_type=None, video_url=None, table=None):
+    clauses, params = [], []
+    for column, value in (("language", language), ("summary_type", summary_type), ("video_url", video_url)):
+        if value:
+            clauses.append(f"{table + '.' if table else ''}{column} = ?")
+            params.append(value)
+    return (" WHERE " + " AND ".join(clauses)) if clauses else "", params
+
+# =============================
+# READ / WRITE
+# =============================
+
+def append(entry, db_path=None):
+    conn = _connect(db_path)
+    with metrics.timer("history_io_seconds", op="append"), conn:
+        cur = conn.execute(
+            f"INSERT INTO history ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)})",
+            [entry.get(field, "") for field in FIELDS],
+        )
+    return cur.lastrowid
+
+def page(offset=0, limit=10, language=None, summary_type=None, video_url=None, db_path=None):
+    """Newest-first slice of the history, optionally filtered."""
+    where, params = _where(language, summary_type, video_url)
+    with metrics.timer("history_io_seconds", op="page"):
+        rows = _connect(db_path).execute(
+            f"SELECT * FROM history{where} ORDER BY id DESC LIMIT ? OFFSET ?",
+            [*params, limit, offset],
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def headers(before_id=None, limit=10, db_path=None):
+    """Newest-first entries older than before_id, with the summary cut to a preview.
+    Seeks on the primary key, so a page deep in the history costs the same as the first."""
+    where, params = (" WHERE id < ?", [before_id]) if before_id is not None else ("", [])
+    with metrics.timer("history_io_seconds", op="headers"):
+        rows = _connect(db_path).execute(
+            f"SELECT id, video_url, summary_type, language, timestamp, substr(summary, 1, ?) AS preview,"
+            f" length(summary) > ? AS truncated FROM history{where} ORDER BY id DESC LIMIT ?",
+            [PREVIEW_CHARS, PREVIEW_CHARS, *params, limit],
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def get(entry_id, db_path=None):
+    row = _connect(db_path).execute("SELECT * FROM history WHERE id = ?", [entry_id]).fetchone()
+    return dict(row) if row else None
+
+def version(db_path=None):
+    """Changes on every append, delete or clear, from any process."""
+    return _connect(db_path).execute("SELECT version FROM history_meta WHERE id = 0").fetchone()[0]
+
+def count(language=None, summary_type=None, video_url=None, db_path=None):
+    where, params = _where(language, summary_type, video_url)
+    if not where:
+        return _connect(db_path).execute("SELECT entries FROM history_meta WHERE id = 0").fetchone()[0]
+    return _connect(db_path).execute(f"SELECT COUNT(*) FROM history{where}", params).fetchone()[0]
+
+def clear(db_path=None):
+    conn = _connect(db_path)
+    with conn:
+        conn.execute("DELETE FROM history")
+
+# =============================
+# FULL-TEXT SEARCH
+# =============================
+
+def _backfill_transcripts(conn):
+    """Indexes transcripts cached before transcript search existed, newest entry per video."""
+    import transcript_cache
+
+    try:
+        names = [n for n in os.listdir(transcript_cache.CACHE_DIR) if n.endswith(".json")]
+    except OSError:
+        return
+    paths = sorted((os.path.join(transcript_cache.CACHE_DIR, n) for n in names), key=os.path.getmtime, reverse=True)
+    for path in paths:
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                entry = json.load(f)
+        except (OSError, ValueError):
+            continue
+        if entry.get("video_id") and entry.get("text"):
+            conn.execute(
+                "INSERT OR IGNORE INTO transcripts (video_id, video_url, language, text, timestamp) "
+                "VALUES (?, ?, ?, ?, ?)",
+                [entry["video_id"], entry.get("video_url") or "", entry.get("language") or "",
+                 entry["text"], entry.get("created") or ""],
+            )
+
+def fts_query(text):
+    """Turns free text into an FTS5 query: every word must match, the last one as a prefix."""
+    words = [w.replace('"', '""') for w in text.split() if any(c.isalnum() for c in w)]
+    if not words:
+        return None
+    return " ".join(f'"{w}"' for w in words[:-1]) + (" " if len(words) > 1 else "") + f'"{words[-1]}"*'
+
+def index_transcript(video_id, video_url, text, language=None, timestamp="", db_path=None):
+    conn = _connect(db_path)
+    with metrics.timer("history_io_seconds", op="index_transcript"), conn:
+        # Delete + insert (not INSERT OR REPLACE) so the delete trigger keeps the index in step
+        conn.execute("DELETE FROM transcripts WHERE video_id = ?", [video_id])
+        conn.execute(
+            "INSERT INTO transcripts (video_id, video_url, language, text, timestamp) VALUES (?, ?, ?, ?, ?)",
+            [video_id, video_url, language or "", text, timestamp],
+        )
+
+def has_transcript(video_id, db_path=None):
+    return _connect(db_path).execute(
+        "SELECT 1 FROM transcripts WHERE video_id = ?", [video_id]
+    ).fetchone() is not None
+
+def search(query, limit=20, language=None, summary_type=None, db_path=None, mark=("**", "**")):
+    """Best-ranked (bm25) summaries matching query, each with a highlighted snippet."""
+    match = fts_query(query)
+    if not match:
+        return []
+    where, params = _where(language, summary_type, table="history")
+    where = (where + " AND" if where else " WHERE") + " history_fts MATCH ?"
+    with metrics.timer("history_io_seconds", op="search"):
+        rows = _connect(db_path).execute(
+            f"SELECT history.*, snippet(history_fts, 0, ?, ?, '…', 24) AS snippet"
+            f" FROM history_fts JOIN history ON history.id = history_fts.rowid{where}"
+            f" ORDER BY bm25(history_fts) LIMIT ?",
+            [*mark, *params, match, limit],
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+def search_transcripts(query, limit=20, language=None, db_path=None, mark=("**", "**")):
+    match = fts_query(query)
+    if not match:
+        return []
+    where, params = _where(language, table="transcripts")
+    where = (where + " AND" if where else " WHERE") + " transcripts_fts MATCH ?"
+    with metrics.timer("history_io_seconds", op="search_transcripts"):
+        rows = _connect(db_path).execute(
+            f"SELECT transcripts.id, video_id, video_url, language, timestamp,"
+            f" snippet(transcripts_fts, 0, ?, ?, '…', 24) AS snippet"
+            f" FROM transcripts_fts JOIN transcripts ON transcripts.id = transcripts_fts.rowid{where}"
+            f" ORDER BY bm25(transcripts_fts) LIMIT ?",
+            [*mark, *params, match, limit],
+        ).fetchall()
+    return [dict(row) for row in rows]
+
+# =============================
+# LEGACY history.json IMPORT
+# =============================
+
+def import_json(json_path, db_path=None):
+    """Imports an old newest-first history.json; returns the number of entries added."""
+    if not os.path.exists(json_path):
+        return 0
+    with open(json_path, "r", encoding="utf-8") as f:
+        entries = json.load(f)
+    conn = _connect(db_path)
+    with conn:
+        # Oldest first, so ids keep increasing with time
+        conn.executemany(
+            f"INSERT INTO history ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)})",
+            [[entry.get(field, "") for field in FIELDS] for entry in reversed(entries)],
+        )
+    return len(entries)
+
+# =============================
+# BENCHMARK
+# =============================
+
+def benchmark(entries=100_000, db_path="history_bench.db"):
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    entry = {
+        "video_url": "https://www.youtube.com/watch?v=dQw4w9WgXcQ",
+        "summary_type": "Paragraph",
+        "language": "English",
+        "summary": "A short benchmark summary. " * 20,
+        "timestamp": "2025-01-01 00:00:00",
+    }
+    # Summaries drawn from a Zipf-like vocabulary, so search terms match realistic fractions
+    rng = random.Random(0)
+    vocabulary = [f"w{i}" for i in range(20_000)]
+    weights = [1 / (i + 1) for i in range(len(vocabulary))]
+    conn = _connect(db_path)
+    with conn:
+        conn.executemany(
+            f"INSERT INTO history ({', '.join(FIELDS)}) VALUES ({', '.join('?' for _ in FIELDS)})",
+            [
+                [entry[field] if field != "summary" else " ".join(rng.choices(vocabulary, weights, k=80))
+                 for field in FIELDS]
+                for _ in range(entries)
+            ],
+        )
+
+    def timed(fn, repeat=200):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    results = {
+        "entries": entries,
+        "append_ms": timed(lambda: append(entry, db_path)),
+        "first_page_ms": timed(lambda: page(0, 10, db_path=db_path)),
+        "deep_page_ms": timed(lambda: page(entries - 10, 10, db_path=db_path), repeat=20),
+        "first_headers_ms": timed(lambda: headers(None, 10, db_path=db_path)),
+        "deep_headers_ms": timed(lambda: headers(11, 10, db_path=db_path)),
+        "version_ms": timed(lambda: version(db_path)),
+        "filtered_page_ms": timed(lambda: page(0, 10, language="English", db_path=db_path)),
+        "count_ms": timed(lambda: count(db_path=db_path), repeat=20),
+        "search_ms": timed(lambda: search("w300 w1200", db_path=db_path), repeat=20),
+        "prefix_search_ms": timed(lambda: search("w1234", db_path=db_path), repeat=20),
+        "filtered_search_ms": timed(lambda: search("w2000", language="English", db_path=db_path), repeat=20),
+    }
+    conn.close()
+    _local.conns.pop(db_path, None)
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+    return results
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name:>18}: {value:.3f}" if isinstance(value, float) else f"{name:>18}: {value}")
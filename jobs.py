@@ -0,0 +1,168 @@
+# Background job queue
+# Runs the download -> transcribe -> summarize pipeline off the Streamlit script thread.
+# Jobs and their progress live in a SQLite table, so the UI can poll them across reruns
+# and unfinished jobs are picked up again after a restart. Each stage has its own pool,
+# so one job's download or summary overlaps another job's transcription, and
+# network-bound downloads and API-bound summarization run at their own concurrency.
+# Transcription is one video at a time: every job decodes on the same shared model,
+# whose lock serializes decodes anyway. A long video is spread across cores by
+# parallel_transcribe's process pool instead (app.WHISPER_PARALLEL_WORKERS).
+
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import metrics
+import workspace
+
+# =============================
+# CONFIGURATION
+# =============================
+
+JOBS_DB = "jobs.db"
+STAGES = ["download", "transcribe", "summarize"]
+DEFAULT_CONCURRENCY = {"download": 4, "transcribe": 1, "summarize": 8}
+MAX_CONCURRENCY = {"transcribe": 1}  # more threads would only queue on the model lock holding audio in memory
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    video_url TEXT NOT NULL,
+    summary_type TEXT NOT NULL,
+    language TEXT NOT NULL,
+    stage TEXT NOT NULL,
+    status TEXT NOT NULL,
+    workdir TEXT,
+    result TEXT NOT NULL DEFAULT '{}',
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created);
+"""
+
+# =============================
+# JOB QUEUE
+# =============================
+
+class JobQueue:
+    """stages maps each stage name to fn(job) -> dict of results merged into the job."""
+
+    def __init__(self, stages, db_path=JOBS_DB, concurrency=None):
+        self.stages = stages
+        self.db_path = db_path
+        concurrency = {**DEFAULT_CONCURRENCY, **(concurrency or {})}
+        for stage, limit in MAX_CONCURRENCY.items():
+            concurrency[stage] = min(concurrency[stage], limit)
+        self.pools = {
+            stage: ThreadPoolExecutor(max_workers=concurrency[stage], thread_name_prefix=f"job-{stage}")
+            for stage in STAGES
+        }
+        self._db_lock = threading.Lock()
+        with self._connect() as conn:
+            conn.executescript(_SCHEMA)
+
+    def _connect(self):
+        conn = sqlite3.connect(self.db_path, timeout=30)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        return conn
+
+    def _update(self, job_id, **fields):
+        fields["updated"] = time.time()
+        columns = ", ".join(f"{name} = ?" for name in fields)
+        with self._db_lock, self._connect() as conn:
+            conn.execute(f"UPDATE jobs SET {columns} WHERE id = ?", [*fields.values(), job_id])
+
+    # -------- submission --------
+
+    def submit(self, video_url, summary_type="Paragraph", language="English"):
+        job_id = uuid.uuid4().hex[:12]
+        now = time.time()
+        with self._db_lock, self._connect() as conn:
+            conn.execute(
+                "INSERT INTO jobs (id, video_url, summary_type, language, stage, status, workdir, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, 'queued', ?, ?, ?)",
+                (job_id, video_url, summary_type, language, STAGES[0],
+                 workspace.create_workspace(job_id), now, now),
+            )
+        self._schedule(job_id, STAGES[0])
+        return job_id
+
+    def submit_many(self, video_urls, summary_type="Paragraph", language="English"):
+        return [self.submit(url, summary_type, language) for url in video_urls if url.strip()]
+
+    def resume(self):
+        """Re-schedules jobs left unfinished by a previous process."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT id, stage FROM jobs WHERE status IN ('queued', 'running') ORDER BY created"
+            ).fetchall()
+        for row in rows:
+            self._schedule(row["id"], row["stage"])
+        return len(rows)
+
+    # -------- execution --------
+
+    def _schedule(self, job_id, stage):
+        self._update(job_id, stage=stage, status="queued")
+        self.pools[stage].submit(self._run_stage, job_id, stage)
+
+    def _run_stage(self, job_id, stage):
+        queued_at = self.get(job_id)["updated"]
+        metrics.observe("job_queue_seconds", time.time() - queued_at, stage=stage)
+        self._update(job_id, status="running")
+        job = self.get(job_id)
+        try:
+            with metrics.timer("job_stage_seconds", stage=stage):
+                result = self.stages[stage](job) or {}
+        except Exception as e:
+            self._update(job_id, status="failed", error=f"{stage}: {e}")
+            return
+        merged = {**job["result"], **result, f"{stage}_seconds": round(time.time() - job["updated"], 2)}
+        self._update(job_id, result=json.dumps(merged, ensure_ascii=False))
+        next_index = STAGES.index(stage) + 1
+        if next_index < len(STAGES):
+            self._schedule(job_id, STAGES[next_index])
+        else:
+            self._update(job_id, status="done")
+
+    # -------- polling --------
+
+    def get(self, job_id):
+        with self._connect() as conn:
+            row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None:
+            return None
+        job = dict(row)
+        job["result"] = json.loads(job["result"])
+        return job
+
+    def list_jobs(self, job_ids=None, limit=50):
+        with self._connect() as conn:
+            if job_ids:
+                marks = ", ".join("?" for _ in job_ids)
+                rows = conn.execute(
+                    f"SELECT id FROM jobs WHERE id IN ({marks}) ORDER BY created DESC", list(job_ids)
+                ).fetchall()
+            else:
+                rows = conn.execute("SELECT id FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+        return [self.get(row["id"]) for row in rows]
+
+    def pending_count(self):
+        with self._connect() as conn:
+            return conn.execute(
+                "SELECT COUNT(*) FROM jobs WHERE status IN ('queued', 'running')"
+            ).fetchone()[0]
+
+    def wait(self, poll_seconds=1.0):
+        """Blocks until every queued job has finished (useful for draining a batch)."""
+        while self.pending_count():
+            time.sleep(poll_seconds)
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown(wait=True)
@@ -0,0 +1,347 @@
+# Rate-limited OpenAI client
+# Wraps the SDK client with what a shared summarization backend needs:
+#   * one pooled HTTP client, so every thread and session reuses keep-alive connections
+#   * a token-bucket scheduler for the requests-per-minute and tokens-per-minute budgets:
+#     concurrent map/fan-out calls queue here instead of collecting 429s from the API
+#   * retries with exponential backoff and full jitter that honour Retry-After, and a
+#     429 pauses every caller, not only the one that got it
+#   * a deadline per request (covering its retries) and cancellation through an Event
+# RateLimitedClient exposes chat.completions.create() like the SDK client, so the
+# summarizer takes it unchanged. Streamlit runs the app on plain threads, so this layer
+# is thread-based rather than asyncio.
+# Run `python llm_client.py` to exercise it against a local server that answers with
+# 429s and slow responses.
+
+import json
+import time
+import random
+import argparse
+import threading
+from types import SimpleNamespace
+from email.utils import parsedate_to_datetime
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import metrics
+
+# openai/httpx are imported on first use: the app should render without them
+
+# =============================
+# CONFIGURATION
+# =============================
+
+RPM_LIMIT = 500
+TPM_LIMIT = 200_000
+MAX_CONNECTIONS = 20
+CONNECT_TIMEOUT = 10
+REQUEST_TIMEOUT = 60  # per attempt; also bounded by what is left of the deadline
+DEADLINE_SECONDS = 180  # per request, across all of its retries
+MAX_RETRIES = 5
+BACKOFF_BASE = 1.0
+BACKOFF_CAP = 30
+COMPLETION_TOKENS_ESTIMATE = 600  # charged up front when max_tokens is not set; settled from usage
+RETRYABLE_STATUS = {408, 409, 429}
+
+class LLMRequestError(Exception):
+    pass
+
+class RequestCancelled(LLMRequestError):
+    pass
+
+class DeadlineExceeded(LLMRequestError):
+    pass
+
+# =============================
+# TOKEN BUCKETS
+# =============================
+
+class TokenBucket:
+    """`per_minute` units, refilled continuously; a burst may use the whole minute's budget."""
+
+    def __init__(self, per_minute):
+        self.capacity = float(per_minute)
+        self.rate = per_minute / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self, now):
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def wait_time(self, amount, now):
+        self._refill(now)
+        amount = min(amount, self.capacity)  # an oversized request waits for a full bucket, not forever
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount):
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, amount):
+        self.level = min(self.capacity, self.level - amount)
+
+class RateLimiter:
+    def __init__(self, rpm=RPM_LIMIT, tpm=TPM_LIMIT):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.paused_until = 0.0
+        self._cond = threading.Condition()
+
+    def acquire(self, tokens, deadline=None, cancel=None):
+        start = time.monotonic()
+        with self._cond:
+            while True:
+                if cancel is not None and cancel.is_set():
+                    raise RequestCancelled("request cancelled before it was sent")
+                now = time.monotonic()
+                wait = max(self.paused_until - now,
+                           self.requests.wait_time(1, now),
+                           self.tokens.wait_time(tokens, now))
+                if wait <= 0:
+                    self.requests.take(1)
+                    self.tokens.take(tokens)
+                    break
+                if deadline is not None and now + wait > deadline:
+                    raise DeadlineExceeded(f"rate-limit budget not available before the deadline ({wait:.0f}s wait)")
+                self._cond.wait(min(wait, 0.25))  # short waits so cancellation is noticed
+        metrics.observe("llm_rate_limit_wait_seconds", time.monotonic() - start)
+
+    def pause(self, seconds):
+        """After a 429, holds back every caller, not just the one that was refused."""
+        with self._cond:
+            self.paused_until = max(self.paused_until, time.monotonic() + seconds)
+
+    def settle(self, estimated, actual):
+        with self._cond:
+            self.tokens.adjust(actual - estimated)
+            self._cond.notify_all()
+
+# =============================
+# RETRIES
+# =============================
+
+def backoff_delay(attempt, base=BACKOFF_BASE, cap=BACKOFF_CAP):
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+def retry_after(error):
+    """Seconds the server asked us to wait (Retry-After / retry-after-ms), or None."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        if headers.get("retry-after-ms"):
+            return float(headers["retry-after-ms"]) / 1000
+        value = headers.get("retry-after")
+        if not value:
+            return None
+        try:
+            return max(0.0, float(value))
+        except ValueError:
+            return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _is_retryable(error):
+    import openai
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    status = getattr(error, "status_code", None)
+    return isinstance(error, openai.APIStatusError) and (status in RETRYABLE_STATUS or status >= 500)
+
+def _estimate_tokens(kwargs):
+    from summarizer import count_tokens
+    prompt = "\n".join(str(m.get("content") or "") for m in kwargs.get("messages", []))
+    completion = kwargs.get("max_tokens") or kwargs.get("max_completion_tokens") or COMPLETION_TOKENS_ESTIMATE
+    return count_tokens(prompt, kwargs.get("model")) + completion
+
+def _wait(seconds, cancel):
+    if cancel is None:
+        time.sleep(seconds)
+    elif cancel.wait(seconds):
+        raise RequestCancelled("request cancelled during retry backoff")
+
+# =============================
+# CLIENT
+# =============================
+
+class _GuardedStream:
+    """Iterates an SDK stream, stopping it on cancellation or when the deadline passes."""
+
+    def __init__(self, stream, cancel, deadline, on_usage):
+        self.stream = stream
+        self.cancel = cancel
+        self.deadline = deadline
+        self.on_usage = on_usage
+
+    def __iter__(self):
+        import httpx
+        import openai
+        try:
+            for chunk in self._chunks():
+                yield chunk
+        except (openai.APIError, httpx.HTTPError) as e:
+            # Read timeouts and dropped connections mid-response cannot be retried: tokens were already shown
+            raise LLMRequestError(f"OpenAI response interrupted: {e}") from e
+        finally:
+            self.stream.close()
+
+    def _chunks(self):
+        for chunk in self.stream:
+            if self.cancel is not None and self.cancel.is_set():
+                raise RequestCancelled("request cancelled while streaming")
+            if time.monotonic() > self.deadline:
+                raise DeadlineExceeded("response still streaming at the deadline")
+            if getattr(chunk, "usage", None):
+                self.on_usage(chunk.usage)
+            yield chunk
+
+class RateLimitedClient:
+    def __init__(self, client, limiter=None, max_retries=MAX_RETRIES, deadline_seconds=DEADLINE_SECONDS, cancel=None):
+        self.client = client
+        self.limiter = limiter or RateLimiter()
+        self.max_retries = max_retries
+        self.deadline_seconds = deadline_seconds
+        self.cancel = cancel
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self.create))
+
+    def scoped(self, cancel=None, deadline_seconds=None):
+        """Same connection pool and budgets, with its own cancel event and/or deadline."""
+        return RateLimitedClient(self.client, self.limiter, self.max_retries,
+                                 deadline_seconds or self.deadline_seconds, cancel)
+
+    def create(self, **kwargs):
+        import openai
+
+        deadline = time.monotonic() + self.deadline_seconds
+        estimate = _estimate_tokens(kwargs)
+        for attempt in range(self.max_retries + 1):
+            self.limiter.acquire(estimate, deadline, self.cancel)
+            remaining = deadline - time.monotonic()
+            try:
+                response = self.client.with_options(
+                    timeout=min(REQUEST_TIMEOUT, max(remaining, 0.1))
+                ).chat.completions.create(**kwargs)
+            except openai.APIError as e:
+                if not _is_retryable(e):
+                    raise LLMRequestError(f"OpenAI API error: {getattr(e, 'message', e)}") from e
+                requested = retry_after(e)
+                delay = requested if requested is not None else backoff_delay(attempt)
+                if getattr(e, "status_code", None) == 429:
+                    self.limiter.pause(delay)
+                    metrics.inc("llm_rate_limited_total")
+                metrics.inc("llm_retries_total", reason=type(e).__name__)
+                if attempt == self.max_retries:
+                    raise LLMRequestError(f"OpenAI API still failing after {attempt + 1} attempts: {e}") from e
+                if time.monotonic() + delay > deadline:
+                    raise DeadlineExceeded(f"OpenAI API did not answer before the deadline: {e}") from e
+                _wait(delay, self.cancel)
+                continue
+            if kwargs.get("stream"):
+                return _GuardedStream(response, self.cancel, deadline,
+                                      lambda usage: self.limiter.settle(estimate, usage.total_tokens))
+            usage = getattr(response, "usage", None)
+            if usage is not None:
+                self.limiter.settle(estimate, usage.total_tokens)
+            return response
+
+def create_client(api_key, base_url=None, rpm=RPM_LIMIT, tpm=TPM_LIMIT, max_connections=MAX_CONNECTIONS):
+    import httpx
+    import openai
+    http_client = openai.DefaultHttpxClient(
+        limits=httpx.Limits(max_connections=max_connections, max_keepalive_connections=max_connections),
+        timeout=httpx.Timeout(REQUEST_TIMEOUT, connect=CONNECT_TIMEOUT),
+    )
+    # Retries are ours: the SDK's own would ignore our budgets and deadlines
+    sdk_client = openai.OpenAI(api_key=api_key, base_url=base_url, max_retries=0, http_client=http_client)
+    return RateLimitedClient(sdk_client, RateLimiter(rpm, tpm))
+
+# =============================
+# SELF-TEST (local mock server)
+# =============================
+
+def serve_mock(rate_limit_every=3, slow_every=5, slow_seconds=3.0, retry_after_seconds=0.5):
+    """Chat completions mock: every Nth request gets a 429 with Retry-After, every Mth is slow."""
+    counter = {"n": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def log_message(self, *args):
+            pass
+
+        def do_POST(self):
+            request = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            with lock:
+                counter["n"] += 1
+                n = counter["n"]
+            if n % rate_limit_every == 0:
+                body = json.dumps({"error": {"message": "Rate limit reached", "type": "requests"}}).encode()
+                self.send_response(429)
+                self.send_header("Retry-After", str(retry_after_seconds))
+            else:
+                if n % slow_every == 0:
+                    time.sleep(slow_seconds)
+                body = json.dumps({
+                    "id": f"mock-{n}", "object": "chat.completion", "created": 0, "model": request["model"],
+                    "choices": [{"index": 0, "finish_reason": "stop",
+                                 "message": {"role": "assistant", "content": f"summary {n}"}}],
+                    "usage": {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15},
+                }).encode()
+                self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            try:
+                self.wfile.write(body)
+            except BrokenPipeError:
+                pass  # the client timed out on a slow response and moved on
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/v1", server
+
+def selftest(requests_count=20, workers=8, rpm=120):
+    global REQUEST_TIMEOUT
+    from concurrent.futures import ThreadPoolExecutor
+    base_url, server = serve_mock()
+    REQUEST_TIMEOUT = 1.0  # the slow responses time out and are retried
+    client = create_client("mock", base_url, rpm=rpm)
+
+    def call(i):
+        response = client.chat.completions.create(model="gpt-4o-mini", messages=[{"role": "user", "content": f"t{i}"}])
+        return response.choices[0].message.content
+
+    try:
+        start = time.perf_counter()
+        with ThreadPoolExecutor(workers) as pool:
+            results = list(pool.map(call, range(requests_count)))
+        elapsed = time.perf_counter() - start
+
+        cancel = threading.Event()
+        cancel.set()
+        try:
+            client.scoped(cancel=cancel).chat.completions.create(model="gpt-4o-mini", messages=[])
+            cancelled = False
+        except RequestCancelled:
+            cancelled = True
+        # Budget for one more request is gone; a 0.5 s deadline cannot wait for it
+        tight = RateLimitedClient(client.client, RateLimiter(rpm=1), deadline_seconds=0.5)
+        tight.limiter.requests.level = 0
+        try:
+            tight.chat.completions.create(model="gpt-4o-mini", messages=[])
+            deadline_hit = False
+        except DeadlineExceeded:
+            deadline_hit = True
+    finally:
+        server.shutdown()
+    counters = metrics.snapshot()["counters"]
+    print(f"{len(results)} requests through 429s and slow responses in {elapsed:.1f}s")
+    for name, value in sorted(counters.items()):
+        if name.startswith("llm_"):
+            print(f"  {name}: {value}")
+    print(f"cancelled before sending: {cancelled}, deadline enforced while queued: {deadline_hit}")
+    return len(results) == requests_count and cancelled and deadline_hit
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Rate-limited OpenAI client self-test")
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--rpm", type=int, default=120)
+    args = parser.parse_args()
+    raise SystemExit(0 if selftest(args.requests, rpm=args.rpm) else 1)
@@ -0,0 +1,166 @@
+# Pipeline instrumentation
+# Process-wide counters and histograms for every pipeline stage, fanned out to pluggable
+# sinks: a JSONL trace file (one event per observation) and/or a Prometheus text-format
+# endpoint on a local port. Sinks are enabled with the METRICS_TRACE_FILE and
+# METRICS_PORT environment variables, or by calling add_sink() directly.
+
+import os
+import json
+import time
+import bisect
+import threading
+from contextlib import contextmanager
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+# =============================
+# CONFIGURATION
+# =============================
+
+DEFAULT_BUCKETS = [0.005, 0.01, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300, 600, 1800]
+RATIO_BUCKETS = [0.05, 0.1, 0.2, 0.3, 0.5, 0.75, 1, 1.5, 2, 5]  # e.g. transcription real-time factor
+
+_counters = {}
+_histograms = {}
+_buckets = {}
+_sinks = []
+_lock = threading.Lock()
+
+# =============================
+# RECORDING
+# =============================
+
+def _label_key(labels):
+    return tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+def _emit(event):
+    for sink in list(_sinks):
+        try:
+            sink.record(event)
+        except Exception:
+            pass  # instrumentation must never break the pipeline
+
+def inc(name, value=1, **labels):
+    with _lock:
+        key = (name, _label_key(labels))
+        _counters[key] = _counters.get(key, 0) + value
+    _emit({"type": "counter", "name": name, "value": value, "labels": labels, "ts": time.time()})
+
+def observe(name, value, buckets=None, **labels):
+    with _lock:
+        if name not in _buckets:
+            _buckets[name] = buckets or DEFAULT_BUCKETS
+        key = (name, _label_key(labels))
+        hist = _histograms.get(key)
+        if hist is None:
+            hist = _histograms[key] = {"counts": [0] * (len(_buckets[name]) + 1), "sum": 0.0, "count": 0}
+        hist["counts"][bisect.bisect_left(_buckets[name], value)] += 1
+        hist["sum"] += value
+        hist["count"] += 1
+    _emit({"type": "histogram", "name": name, "value": value, "labels": labels, "ts": time.time()})
+
+@contextmanager
+def timer(name, **labels):
+    """Observes the duration of the block in seconds; labels may be updated inside it."""
+    start = time.perf_counter()
+    try:
+        yield labels
+    except BaseException:
+        labels["outcome"] = "error"
+        raise
+    finally:
+        labels.setdefault("outcome", "ok")
+        observe(name, time.perf_counter() - start, **labels)
+
+def snapshot():
+    with _lock:
+        return {
+            "counters": {f"{n}{dict(l)}": v for (n, l), v in _counters.items()},
+            "histograms": {
+                f"{n}{dict(l)}": {"count": h["count"], "sum": round(h["sum"], 4)}
+                for (n, l), h in _histograms.items()
+            },
+        }
+
+# =============================
+# PROMETHEUS TEXT FORMAT
+# =============================
+
+def _format_labels(labels, extra=None):
+    pairs = list(labels) + (extra or [])
+    if not pairs:
+        return ""
+    return "{" + ",".join(f'{k}="{str(v).replace(chr(34), chr(39))}"' for k, v in pairs) + "}"
+
+def render_prometheus():
+    lines = []
+    with _lock:
+        for name in sorted({n for n, _ in _counters}):
+            lines.append(f"# TYPE {name} counter")
+            for (n, labels), value in _counters.items():
+                if n == name:
+                    lines.append(f"{name}{_format_labels(labels)} {value}")
+        for name in sorted({n for n, _ in _histograms}):
+            lines.append(f"# TYPE {name} histogram")
+            for (n, labels), hist in _histograms.items():
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(_buckets[name] + ["+Inf"], hist["counts"]):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_format_labels(labels, [('le', bound)])} {cumulative}")
+                lines.append(f"{name}_sum{_format_labels(labels)} {hist['sum']}")
+                lines.append(f"{name}_count{_format_labels(labels)} {hist['count']}")
+    return "\n".join(lines) + "\n"
+
+# =============================
+# SINKS
+# =============================
+
+class JsonlTraceSink:
+    def __init__(self, path):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def record(self, event):
+        line = json.dumps(event, ensure_ascii=False, default=str)
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+class PrometheusSink:
+    """Serves render_prometheus() at http://host:port/metrics."""
+
+    def __init__(self, port=9464, host="127.0.0.1"):
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = render_prometheus().encode("utf-8")
+                self.send_response(200 if self.path.startswith("/metrics") else 404)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def record(self, event):
+        pass  # scraped from the shared registry instead
+
+def add_sink(sink):
+    _sinks.append(sink)
+    return sink
+
+def configure_from_env():
+    if _sinks:
+        return
+    if os.environ.get("METRICS_TRACE_FILE"):
+        add_sink(JsonlTraceSink(os.environ["METRICS_TRACE_FILE"]))
+    if os.environ.get("METRICS_PORT"):
+        try:
+            add_sink(PrometheusSink(int(os.environ["METRICS_PORT"])))
+        except OSError:
+            pass  # another process already serves the port
+
+configure_from_env()
@@ -0,0 +1,196 @@
+# Process-wide ASR model registry
+# Streamlit re-runs app.py on every interaction, but imported modules stay loaded,
+# so models kept here are loaded once per process and shared by every session.
+# Models are keyed by (engine, size, device, compute type); see asr_engines.
+# Once a model is loaded a daemon thread evicts idle ones, so an idle server frees them.
+
+import os
+import sys
+import threading
+import time
+
+import metrics
+import asr_engines
+
+# The engines import torch/whisper/ctranslate2 on first use: they take seconds to load
+# and the app should render without them
+
+# =============================
+# CONFIGURATION
+# =============================
+
+IDLE_EVICT_SECONDS = 30 * 60  # drop models nobody has used for 30 minutes
+EVICT_CHECK_SECONDS = 60  # how often the background evictor looks, once a model is loaded
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+
+_models = {}
+_registry_lock = threading.Lock()
+_loading_locks = {}  # key -> lock held while that model loads
+_decode_totals = {"decode_seconds": 0.0, "audio_seconds": 0.0}
+_totals_lock = threading.Lock()
+_evictor = None
+
+# =============================
+# LOADING + LOOKUP
+# =============================
+
+def default_device(engine=None):
+    return asr_engines.get_engine(engine).default_device()
+
+def _resolve_key(model_size, device, dtype, engine=None):
+    engine = engine or asr_engines.DEFAULT_ENGINE
+    device = device or default_device(engine)
+    dtype = dtype or asr_engines.get_engine(engine).default_compute_type(device)
+    return (engine, model_size, device, dtype)
+
+def _rss_bytes():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError):
+        return 0
+
+def is_loaded(model_size="small", device=None, dtype=None, engine=None):
+    return _resolve_key(model_size, device, dtype, engine) in _models
+
+def _get_entry(model_size="small", device=None, dtype=None, engine=None, threads=None):
+    key = _resolve_key(model_size, device, dtype, engine)
+    evict_idle_models()
+    with _registry_lock:
+        entry = _models.get(key)
+        if entry is not None:
+            entry["last_used"] = time.time()
+            return key, entry
+        loading = _loading_locks.setdefault(key, threading.Lock())
+    # Loading takes seconds: hold only this key's lock so stats, eviction and other
+    # models stay available, while concurrent callers of the same model wait for one load
+    with loading:
+        with _registry_lock:
+            entry = _models.get(key)
+        if entry is None:
+            backend = asr_engines.get_engine(key[0])
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = backend.load(key[1], key[2], key[3], threads)
+            load_seconds = time.perf_counter() - start
+            metrics.observe("whisper_model_load_seconds", load_seconds, engine=key[0], model=key[1], device=key[2])
+            memory_bytes = backend.memory_bytes(model)
+            entry = {
+                "model": model,
+                "lock": threading.Lock(),
+                "load_seconds": load_seconds,
+                # Engines that do not expose their weights are measured by RSS growth
+                "memory_bytes": memory_bytes if memory_bytes is not None else max(0, _rss_bytes() - rss_before),
+                "loaded_at": time.time(),
+                "last_used": time.time(),
+                "uses": 0,
+            }
+            with _registry_lock:
+                _models[key] = entry
+                _loading_locks.pop(key, None)
+            _start_evictor()
+    entry["last_used"] = time.time()
+    return key, entry
+
+def get_model(model_size="small", device=None, dtype=None, engine=None, threads=None):
+    return _get_entry(model_size, device, dtype, engine, threads)[1]["model"]
+
+# =============================
+# TRANSCRIPTION ENTRY POINT
+# =============================
+
+def transcribe(audio, model_size="small", device=None, dtype=None, engine=None, threads=None, **options):
+    """Transcribes on the shared model, one caller at a time per model. dtype is the
+    engine's compute type (fp16/fp32 for whisper, int8/float16/... for faster-whisper)."""
+    key, entry = _get_entry(model_size, device, dtype, engine, threads)
+    with entry["lock"]:
+        entry["uses"] += 1
+        start = time.perf_counter()
+        try:
+            result = asr_engines.get_engine(key[0]).transcribe(entry["model"], audio, key[3], **options)
+        finally:
+            entry["last_used"] = time.time()
+        decode_seconds = time.perf_counter() - start
+    _record_decode(audio, result, decode_seconds, key)
+    return result
+
+def _record_decode(audio, result, decode_seconds, key):
+    labels = {"engine": key[0], "model": key[1], "device": key[2]}
+    metrics.observe("whisper_decode_seconds", decode_seconds, **labels)
+    # Exact for in-memory audio; for files the end of the last segment is a close lower bound
+    if isinstance(audio, str):
+        segments = result.get("segments") or []
+        audio_seconds = segments[-1]["end"] if segments else 0
+    else:
+        audio_seconds = len(audio) / SAMPLE_RATE
+    if audio_seconds > 0:
+        with _totals_lock:
+            _decode_totals["decode_seconds"] += decode_seconds
+            _decode_totals["audio_seconds"] += audio_seconds
+        metrics.inc("whisper_audio_seconds_total", audio_seconds, **labels)
+        metrics.observe("whisper_real_time_factor", decode_seconds / audio_seconds,
+                        buckets=metrics.RATIO_BUCKETS, **labels)
+
+def observed_real_time_factor():
+    """Decode seconds per audio second over everything transcribed in this process, or None."""
+    with _totals_lock:
+        decode_seconds, audio_seconds = _decode_totals["decode_seconds"], _decode_totals["audio_seconds"]
+    if not audio_seconds:
+        return None
+    return decode_seconds / audio_seconds
+
+# =============================
+# EVICTION + STATS
+# =============================
+
+def evict_idle_models(max_idle_seconds=IDLE_EVICT_SECONDS):
+    now = time.time()
+    evicted = []
+    with _registry_lock:
+        for key, entry in list(_models.items()):
+            if now - entry["last_used"] < max_idle_seconds:
+                continue
+            # Never evict a model that is in the middle of a transcription
+            if not entry["lock"].acquire(blocking=False):
+                continue
+            try:
+                del _models[key]
+                evicted.append(key)
+            finally:
+                entry["lock"].release()
+    if evicted and "torch" in sys.modules:
+        import torch
+        if torch.cuda.is_available():
+            torch.cuda.empty_cache()
+    return evicted
+
+def _start_evictor(interval=EVICT_CHECK_SECONDS):
+    """Evicts idle models from a daemon thread, so a server nobody uses frees them too."""
+    global _evictor
+    with _registry_lock:
+        if _evictor is not None:
+            return
+        _evictor = threading.Thread(target=_evict_forever, args=(interval,), name="model-evictor", daemon=True)
+    _evictor.start()
+
+def _evict_forever(interval):
+    while True:
+        time.sleep(interval)
+        evict_idle_models()
+
+def model_stats():
+    now = time.time()
+    stats = []
+    with _registry_lock:
+        for (engine, model_size, device, dtype), entry in _models.items():
+            stats.append({
+                "engine": engine,
+                "model_size": model_size,
+                "device": device,
+                "dtype": dtype,
+                "load_seconds": round(entry["load_seconds"], 2),
+                "memory_mb": round(entry["memory_bytes"] / (1024 * 1024), 1),
+                "idle_seconds": round(now - entry["last_used"], 1),
+                "uses": entry["uses"],
+            })
+    return stats
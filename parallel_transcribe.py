@@ -0,0 +1,199 @@
+# Chunked, parallel Whisper transcription
+# Long audio is split at low-energy (silence) points, the chunks are transcribed on a
+# process pool where every worker keeps its own loaded model, and the segments are
+# stitched back together with timestamps shifted to the original timeline.
+# Run `python parallel_transcribe.py audio.wav` to compare against the single-call path.
+
+import os
+import time
+import argparse
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+# =============================
+# CONFIGURATION
+# =============================
+
+SAMPLE_RATE = 16000  # whisper.audio.SAMPLE_RATE
+FRAME_SAMPLES = 480  # 30 ms energy frames
+CHUNK_SECONDS = 5 * 60
+SPLIT_SEARCH_SECONDS = 20  # look this far either side of the target for a pause
+OVERLAP_SECONDS = 1.0  # audio re-fed at each chunk start so no word is cut in half
+
+_pools = {}
+
+# =============================
+# VOICE ACTIVITY SPLITTING
+# =============================
+
+def frame_energies(audio):
+    n_frames = len(audio) // FRAME_SAMPLES
+    frames = audio[:n_frames * FRAME_SAMPLES].reshape(n_frames, FRAME_SAMPLES)
+    return np.sqrt(np.mean(frames.astype(np.float32) ** 2, axis=1))
+
+def find_split_points(audio, chunk_seconds=CHUNK_SECONDS, search_seconds=SPLIT_SEARCH_SECONDS):
+    """Returns sample offsets of the quietest point near every chunk_seconds mark."""
+    energies = frame_energies(audio)
+    if len(energies) == 0:
+        return []
+    # Smooth over ~300 ms so a pause wins over a single quiet frame mid-word
+    smooth = np.convolve(energies, np.ones(10) / 10, mode="same")
+    frames_per_second = SAMPLE_RATE / FRAME_SAMPLES
+    chunk_frames = int(chunk_seconds * frames_per_second)
+    search_frames = int(search_seconds * frames_per_second)
+
+    splits, pos = [], 0
+    while pos + chunk_frames < len(smooth):
+        target = pos + chunk_frames
+        lo = max(pos + 1, target - search_frames)
+        hi = min(len(smooth), target + search_frames)
+        split = lo + int(np.argmin(smooth[lo:hi]))
+        splits.append(split * FRAME_SAMPLES)
+        pos = split
+    return splits
+
+def split_audio(audio, chunk_seconds=CHUNK_SECONDS, overlap_seconds=OVERLAP_SECONDS):
+    """Yields (chunk_audio, chunk_offset_seconds, boundary_seconds) tuples."""
+    bounds = [0, *find_split_points(audio, chunk_seconds), len(audio)]
+    overlap = int(overlap_seconds * SAMPLE_RATE)
+    for start, end in zip(bounds[:-1], bounds[1:]):
+        padded_start = max(0, start - overlap)
+        yield audio[padded_start:end], padded_start / SAMPLE_RATE, start / SAMPLE_RATE
+
+# =============================
+# WORKER PROCESS
+# =============================
+
+_worker_model = None
+_worker_engine = None
+
+def _init_worker(model_size, threads, engine, compute_type):
+    global _worker_model, _worker_engine
+    import asr_engines
+    _worker_engine = (asr_engines.get_engine(engine), compute_type)
+    _worker_model = _worker_engine[0].load(model_size, "cpu", compute_type, threads)
+
+def _transcribe_chunk(chunk, options):
+    backend, compute_type = _worker_engine
+    result = backend.transcribe(_worker_model, chunk, compute_type, **options)
+    return {
+        "language": result.get("language"),
+        "segments": [
+            {"start": s["start"], "end": s["end"], "text": s["text"], "words": s.get("words") or []}
+            for s in result["segments"]
+        ],
+    }
+
+def _ping():
+    return os.getpid()
+
+def get_pool(model_size="small", workers=2, engine=None, compute_type=None):
+    import asr_engines
+    engine = engine or asr_engines.DEFAULT_ENGINE
+    # Workers always run on CPU
+    compute_type = compute_type or asr_engines.get_engine(engine).default_compute_type("cpu")
+    key = (engine, model_size, compute_type, workers)
+    if key not in _pools:
+        threads = max(1, (os.cpu_count() or workers) // workers)
+        _pools[key] = ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(model_size, threads, engine, compute_type),
+        )
+    return _pools[key]
+
+def warm_pool(model_size="small", workers=2, engine=None, compute_type=None):
+    """Starts every worker (and so loads every model) before the first real chunk arrives."""
+    pool = get_pool(model_size, workers, engine, compute_type)
+    for future in [pool.submit(_ping) for _ in range(workers)]:
+        future.result()
+    return pool
+
+def shutdown_pools():
+    for pool in _pools.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _pools.clear()
+
+# =============================
+# STITCHING
+# =============================
+
+def stitch(chunk_results):
+    """chunk_results: list of (result, offset_seconds, boundary_seconds) in audio order."""
+    segments = []
+    for result, offset, boundary in chunk_results:
+        for seg in result["segments"]:
+            start, end = seg["start"] + offset, seg["end"] + offset
+            # Segments that finish inside the overlap were already covered by the previous chunk
+            if segments and end <= boundary + 0.2:
+                continue
+            if segments and seg["text"].strip() == segments[-1]["text"].strip():
+                continue
+            words = [
+                {"word": w["word"], "start": round(w["start"] + offset, 2), "end": round(w["end"] + offset, 2)}
+                for w in seg.get("words") or []
+            ]
+            segments.append({"start": round(start, 2), "end": round(end, 2), "text": seg["text"], "words": words})
+    language = next((r["language"] for r, _, _ in chunk_results if r.get("language")), None)
+    return {"text": "".join(s["text"] for s in segments), "segments": segments, "language": language}
+
+def transcribe_parallel(audio_file, model_size="small", workers=2, chunk_seconds=CHUNK_SECONDS,
+                        engine=None, compute_type=None, **options):
+    import asr_engines
+    # Already-decoded (e.g. preprocessed) audio is taken as is
+    audio = audio_file if isinstance(audio_file, np.ndarray) else asr_engines.load_audio(audio_file)
+    chunks = list(split_audio(audio, chunk_seconds))
+    pool = get_pool(model_size, workers, engine, compute_type)
+    futures = [pool.submit(_transcribe_chunk, chunk, options) for chunk, _, _ in chunks]
+    return stitch([(f.result(), offset, boundary) for f, (_, offset, boundary) in zip(futures, chunks)])
+
+# =============================
+# BENCHMARK
+# =============================
+
+def word_error_rate(reference, hypothesis):
+    ref, hyp = reference.lower().split(), hypothesis.lower().split()
+    if not ref:
+        return 0.0 if not hyp else 1.0
+    previous = list(range(len(hyp) + 1))
+    for i, r in enumerate(ref, 1):
+        current = [i] + [0] * len(hyp)
+        for j, h in enumerate(hyp, 1):
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (r != h))
+        previous = current
+    return previous[-1] / len(ref)
+
+def benchmark(audio_file, model_size="small", workers=2):
+    import asr_engines
+    import model_registry
+    duration = len(asr_engines.load_audio(audio_file)) / SAMPLE_RATE
+
+    start = time.perf_counter()
+    single = model_registry.transcribe(audio_file, model_size, device="cpu")
+    single_seconds = time.perf_counter() - start
+
+    warm_pool(model_size, workers)  # model loading is not part of the timed run
+    start = time.perf_counter()
+    parallel = transcribe_parallel(audio_file, model_size, workers)
+    parallel_seconds = time.perf_counter() - start
+
+    return {
+        "audio_seconds": round(duration, 1),
+        "single_seconds": round(single_seconds, 2),
+        "parallel_seconds": round(parallel_seconds, 2),
+        "speedup": round(single_seconds / parallel_seconds, 2),
+        "wer_vs_single": round(word_error_rate(single["text"], parallel["text"]), 4),
+    }
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare single-call and parallel Whisper transcription")
+    parser.add_argument("audio_file")
+    parser.add_argument("--model", default="small")
+    parser.add_argument("--workers", type=int, default=max(2, (os.cpu_count() or 2) // 2))
+    args = parser.parse_args()
+    for name, value in benchmark(args.audio_file, args.model, args.workers).items():
+        print(f"{name:>18}: {value}")
+    shutdown_pools()
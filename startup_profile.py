@@ -0,0 +1,115 @@
+# Cold-start profile
+# Measures what the first page load costs, so cold-start regressions are caught:
+#   * per-module import time of `import app` (python -X importtime, fresh interpreter)
+#   * RSS after the first render of the page (streamlit's AppTest, fresh interpreter)
+#   * which heavy dependencies were loaded by that first render (there should be none)
+# Usage: python startup_profile.py [--max-import-seconds 2] [--max-rss-mb 300] [--json out.json]
+
+import sys
+import json
+import argparse
+import subprocess
+
+HEAVY_MODULES = ["torch", "whisper", "faster_whisper", "ctranslate2", "pywhispercpp", "yt_dlp", "pytube", "openai", "tiktoken"]  # numpy comes with streamlit itself
+
+_RENDER_SNIPPET = """
+import os, sys, json, resource
+from streamlit.testing.v1 import AppTest
+
+def rss_mb():
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == "darwin" else 1024)
+
+at = AppTest.from_file("app.py", default_timeout=120)
+at.run()
+print(json.dumps({
+    "rss_mb": round(rss_mb(), 1),
+    "exceptions": [str(e.value) for e in at.exception],
+    "heavy_modules_loaded": [m for m in %r if m in sys.modules],
+}))
+"""
+
+# =============================
+# MEASUREMENTS
+# =============================
+
+def import_times(target="app", top=15):
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {target}"],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    modules = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "|" not in line:
+            continue
+        _, cumulative, name = [part.strip() for part in line[len("import time:"):].split("|")]
+        if not cumulative.isdigit():
+            continue  # header row
+        raw_name = line.rsplit("|", 1)[1]
+        depth = (len(raw_name) - len(raw_name.lstrip())) // 2
+        modules.append({"module": name, "cumulative_ms": int(cumulative) / 1000, "depth": depth})
+    top_level = [m for m in modules if m["depth"] == 0]
+    return {
+        "total_seconds": round(sum(m["cumulative_ms"] for m in top_level) / 1000, 3),
+        "slowest": sorted(
+            ({"module": m["module"], "cumulative_ms": round(m["cumulative_ms"], 1)} for m in top_level),
+            key=lambda m: m["cumulative_ms"], reverse=True,
+        )[:top],
+    }
+
+def first_render():
+    proc = subprocess.run(
+        [sys.executable, "-c", _RENDER_SNIPPET % (HEAVY_MODULES,)],
+        capture_output=True, text=True,
+    )
+    if proc.returncode != 0:
+        raise RuntimeError(proc.stderr.strip().splitlines()[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+# =============================
+# ENTRY POINT
+# =============================
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Profile the Streamlit app's cold start")
+    parser.add_argument("--max-import-seconds", type=float, help="fail if `import app` takes longer")
+    parser.add_argument("--max-rss-mb", type=float, help="fail if RSS after first render is higher")
+    parser.add_argument("--json", help="also write the profile to this file")
+    args = parser.parse_args(argv)
+
+    profile = {"imports": import_times(), "first_render": first_render()}
+    print(f"import app: {profile['imports']['total_seconds']}s")
+    for m in profile["imports"]["slowest"]:
+        print(f"  {m['cumulative_ms']:>9.1f} ms  {m['module']}")
+    render = profile["first_render"]
+    print(f"RSS after first render: {render['rss_mb']} MB")
+    print(f"Heavy modules loaded by first render: {', '.join(render['heavy_modules_loaded']) or 'none'}")
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(profile, f, indent=4)
+
+    problems = []
+    if render["exceptions"]:
+        problems.append(f"first render raised: {render['exceptions']}")
+    if render["heavy_modules_loaded"]:
+        problems.append(f"first render imported {render['heavy_modules_loaded']}")
+    if args.max_import_seconds and profile["imports"]["total_seconds"] > args.max_import_seconds:
+        problems.append(f"import took {profile['imports']['total_seconds']}s > {args.max_import_seconds}s")
+    if args.max_rss_mb and render["rss_mb"] > args.max_rss_mb:
+        problems.append(f"RSS {render['rss_mb']} MB > {args.max_rss_mb} MB")
+    for problem in problems:
+        print(f"REGRESSION: {problem}")
+    return 1 if problems else 0
+
+if __name__ == "__main__":
+    raise SystemExit(main())
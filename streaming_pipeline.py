@@ -0,0 +1,171 @@
+# Streaming download -> transcription pipeline
+# ffmpeg pulls the audio stream that yt_dlp resolves and decodes it to 16 kHz mono PCM
+# as bytes arrive. Fixed-length windows go through a bounded queue (a slow transcriber
+# blocks the reader, which in turn stops ffmpeg pulling more data) and are transcribed
+# one by one, so the first segments show up while the download is still running.
+# Run `python streaming_pipeline.py some_audio.mp3` to try it offline: the file is
+# served from a local HTTP server and streamed through the same path.
+
+import os
+import sys
+import queue
+import functools
+import shutil
+import threading
+import subprocess
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+
+import numpy as np
+import yt_dlp
+
+import model_registry
+from parallel_transcribe import frame_energies, FRAME_SAMPLES
+
+# =============================
+# CONFIGURATION
+# =============================
+
+SAMPLE_RATE = 16000
+WINDOW_SECONDS = 30  # Whisper's native context length
+CUT_SEARCH_SECONDS = 3  # cut each window at the quietest point in its last few seconds
+QUEUE_WINDOWS = 4  # backpressure: at most this many decoded windows wait for Whisper
+PROMPT_CHARS = 200  # tail of the previous text fed as initial_prompt for continuity
+
+_DONE = object()
+
+class StreamError(RuntimeError):
+    """ffmpeg stopped before the end of the stream (reset, 403, expired URL...)."""
+
+# =============================
+# SOURCE
+# =============================
+
+def resolve_stream_url(video_url):
+    """Returns (direct media URL, HTTP headers) for the best audio format without downloading it."""
+    with yt_dlp.YoutubeDL({'format': 'bestaudio/best', 'noplaylist': True, 'quiet': True}) as ydl:
+        info = ydl.extract_info(video_url, download=False)
+    # The media URL is only honoured with the headers yt_dlp resolved it with
+    return info["url"], info.get("http_headers") or {}
+
+def _read_pcm(media_url, windows, stop, window_seconds, headers=None):
+    ffmpeg = shutil.which("ffmpeg") or "ffmpeg"
+    header_args = ["-headers", "".join(f"{k}: {v}\r\n" for k, v in headers.items())] if headers else []
+    window_bytes = int(window_seconds * SAMPLE_RATE) * 2
+    proc = None
+    try:
+        # Inside the try: a missing ffmpeg must still reach the consumer, which waits for _DONE
+        proc = subprocess.Popen(
+            [ffmpeg, "-nostdin", "-loglevel", "error", *header_args, "-i", media_url,
+             "-f", "s16le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-"],
+            stdout=subprocess.PIPE, stderr=subprocess.PIPE,
+        )
+        while not stop.is_set():
+            data = proc.stdout.read(window_bytes)
+            if not data:
+                # EOF is also what a reset or a 403 mid-stream looks like: ask ffmpeg how it ended
+                if proc.wait() != 0:
+                    error = proc.stderr.read().decode("utf-8", errors="replace").strip()
+                    windows.put(StreamError(f"ffmpeg exited with status {proc.returncode}: {error[-500:]}"))
+                break
+            windows.put(np.frombuffer(data, np.int16).astype(np.float32) / 32768.0)
+    except Exception as e:
+        windows.put(e)
+    finally:
+        if proc is not None:
+            proc.kill()
+            proc.wait()
+        windows.put(_DONE)
+
+# =============================
+# INCREMENTAL TRANSCRIPTION
+# =============================
+
+def _quiet_cut(audio):
+    """Sample index of the quietest frame in the last CUT_SEARCH_SECONDS of the buffer."""
+    search = int(CUT_SEARCH_SECONDS * SAMPLE_RATE)
+    if len(audio) <= search:
+        return len(audio)
+    energies = frame_energies(audio[-search:])
+    if len(energies) == 0:
+        return len(audio)
+    return len(audio) - search + int(np.argmin(energies)) * FRAME_SAMPLES
+
+def stream_transcribe(video_url=None, media_url=None, model_size="small",
+                      window_seconds=WINDOW_SECONDS, queue_windows=QUEUE_WINDOWS, **options):
+    """Yields transcript segments (start/end/text, in seconds of the source) as they are decoded.
+
+    Pass media_url to stream a direct audio URL (e.g. from a local HTTP server) instead
+    of resolving video_url through yt_dlp. Raises StreamError, after yielding what was
+    decoded, when the stream ends early.
+    """
+    headers = None
+    if not media_url:
+        media_url, headers = resolve_stream_url(video_url)
+    windows = queue.Queue(maxsize=queue_windows)
+    stop = threading.Event()
+    reader = threading.Thread(
+        target=_read_pcm, args=(media_url, windows, stop, window_seconds, headers), daemon=True
+    )
+    reader.start()
+
+    carry = np.zeros(0, dtype=np.float32)
+    offset = 0.0
+    previous_text = ""
+    try:
+        while True:
+            item = windows.get()
+            if isinstance(item, Exception):
+                raise item
+            finished = item is _DONE
+            buffer = carry if finished else np.concatenate([carry, item])
+            if len(buffer) == 0:
+                break
+            # Hold back the audio after the last pause so words are not cut in half
+            cut = len(buffer) if finished else _quiet_cut(buffer)
+            window, carry = buffer[:cut], buffer[cut:]
+            if len(window):
+                prompt = previous_text[-PROMPT_CHARS:] or None
+                result = model_registry.transcribe(window, model_size, initial_prompt=prompt, **options)
+                for seg in result["segments"]:
+                    segment = {
+                        "start": round(seg["start"] + offset, 2),
+                        "end": round(min(seg["end"], cut / SAMPLE_RATE) + offset, 2),
+                        "text": seg["text"],
+                        "words": [
+                            {"word": w["word"], "start": round(w["start"] + offset, 2), "end": round(w["end"] + offset, 2)}
+                            for w in seg.get("words") or []
+                        ],
+                    }
+                    previous_text += seg["text"]
+                    yield segment
+                offset += cut / SAMPLE_RATE
+            if finished:
+                break
+    finally:
+        stop.set()
+        # Unblock the reader if it is waiting on a full queue
+        while reader.is_alive():
+            try:
+                windows.get_nowait()
+            except queue.Empty:
+                reader.join(timeout=0.1)
+
+# =============================
+# OFFLINE DEMO
+# =============================
+
+def serve_file(path):
+    """Serves one local file over HTTP on a free port; returns (url, server)."""
+    directory, name = os.path.split(os.path.abspath(path))
+    handler = functools.partial(SimpleHTTPRequestHandler, directory=directory)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return f"http://127.0.0.1:{server.server_address[1]}/{name}", server
+
+if __name__ == "__main__":
+    url, server = serve_file(sys.argv[1])
+    try:
+        for segment in stream_transcribe(media_url=url):
+            print(f"[{segment['start']:8.2f} -> {segment['end']:8.2f}] {segment['text'].strip()}")
+    finally:
+        server.shutdown()
@@ -0,0 +1,319 @@
+# Summarization engine
+# Builds the per-format prompts and, for transcripts too long for one prompt, runs a
+# map-reduce pass: segment-aligned chunks are summarized concurrently and the partial
+# notes are combined into the requested format. Every call takes the OpenAI client as
+# an argument, so any object exposing chat.completions.create() can stand in for it.
+
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import metrics
+
+# =============================
+# CONFIGURATION
+# =============================
+
+SUMMARY_MODEL = "gpt-4o-mini"
+PROMPT_VERSION = 1  # bump whenever a prompt below changes, so cached summaries are not reused
+TEMPERATURE = 0.7
+MAP_REDUCE_THRESHOLD_TOKENS = 12000  # longer transcripts are chunked
+CHUNK_TOKENS = 6000
+CHUNK_OVERLAP_TOKENS = 200
+MAX_WORKERS = 4
+
+# =============================
+# PROMPTS
+# =============================
+
+def build_prompt(text, summary_type="Paragraph", language="English"):
+    if summary_type == "Paragraph":
+        return f"Summarize this transcript into one short, clear paragraph in {language}:\n\n{text}"
+
+    elif summary_type == "Bullet Points":
+        return f"""
+Summarize the following transcript into short, clear **numbered points** in {language}.
+Each point should capture one key idea or event on a new line.
+Do not repeat similar ideas.
+Output format:
+1. ...
+2. ...
+3. ...
+Transcript:
+{text}
+"""
+
+    elif summary_type == "Conversational":
+        return f"""
+Convert the following text into a natural back-and-forth dialogue between Speaker 1 and Speaker 2 in {language}.
+Each line should be in this format:
+Speaker 1: "..."
+Speaker 2: "..."
+Alternate naturally between them, only including ideas found in the text.
+
+Transcript:
+{text}
+"""
+    return text
+
+def build_map_prompt(chunk, index, total):
+    return f"""
+The following is part {index} of {total} of a longer video transcript.
+Write concise notes covering every key idea, event, name and number in this part.
+Keep the notes in the transcript's own language and do not add anything that is not in the text.
+
+Transcript part:
+{chunk}
+"""
+
+def build_digest_prompt(text):
+    return f"""
+Write a detailed, well-organised digest of the following transcript in English.
+Cover every key idea, event, name and number in the order they appear, as plain sentences.
+It will be used as the only source for shorter summaries in several formats and languages,
+so do not leave out anything important and do not add anything that is not in the text.
+
+Transcript:
+{text}
+"""
+
+def build_translate_prompt(summary, summary_type, language):
+    return f"""
+Translate the following {summary_type} summary into {language}.
+Keep the exact same structure: the same numbering, line breaks and Speaker 1 / Speaker 2 labels.
+Output only the translation.
+
+Summary:
+{summary}
+"""
+
+# =============================
+# TOKENS + CHUNKING
+# =============================
+
+_encodings = {}
+_tiktoken = None
+
+def _load_tiktoken():
+    global _tiktoken
+    if _tiktoken is None:
+        try:
+            import tiktoken
+            _tiktoken = tiktoken
+        except ImportError:  # fall back to a character-based estimate
+            _tiktoken = False
+    return _tiktoken or None
+
+def count_tokens(text, model=SUMMARY_MODEL):
+    tiktoken = _load_tiktoken()
+    if tiktoken is None:
+        return max(1, len(text) // 4)
+    if model not in _encodings:
+        try:
+            _encodings[model] = tiktoken.encoding_for_model(model)
+        except KeyError:
+            _encodings[model] = tiktoken.get_encoding("o200k_base")
+    return len(_encodings[model].encode(text, disallowed_special=()))
+
+def _split_oversized(text, max_tokens):
+    words = text.split()
+    pieces, start = [], 0
+    while start < len(words):
+        end, tokens = start, 0
+        while end < len(words) and (end == start or tokens + count_tokens(" " + words[end]) <= max_tokens):
+            tokens += count_tokens(" " + words[end])
+            end += 1
+        # Word counts only estimate the joined piece's; give back words until it fits
+        while end - start > 1 and count_tokens(" ".join(words[start:end])) > max_tokens:
+            end -= 1
+        pieces.append(" ".join(words[start:end]))
+        start = end
+    return pieces
+
+def split_units(text, segments=None):
+    """Returns the transcript as a list of segment texts (or sentences when no segments exist)."""
+    if segments:
+        units = [s["text"].strip() for s in segments if s["text"].strip()]
+    else:
+        units = [u.strip() for u in re.split(r"(?<=[.!?])\s+", text) if u.strip()]
+    return units
+
+def _fit(units, carried, chunk_tokens):
+    """Per-unit counts do not add up exactly to the joined text's (separators, rounding),
+    so the joined chunk is counted. Units that push it over go back to be chunked again,
+    newest first; if the last new unit alone is still too long, carried-over overlap is
+    dropped. Returns (units, number sent back)."""
+    sent_back = 0
+    while count_tokens(" ".join(u for u, _ in units)) > chunk_tokens:
+        if len(units) - carried > 1:
+            units = units[:-1]
+            sent_back += 1
+        elif carried:
+            units, carried = units[1:], carried - 1
+        else:
+            break  # one unit that _split_oversized could not split further
+    return units, sent_back
+
+def chunk_transcript(text, segments=None, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS):
+    units = []
+    for unit in split_units(text, segments):
+        tokens = count_tokens(unit)
+        if tokens > chunk_tokens:
+            units.extend((piece, count_tokens(piece)) for piece in _split_oversized(unit, chunk_tokens))
+        else:
+            units.append((unit, tokens))
+
+    # carried: how many leading units of current are overlap from the previous chunk
+    chunks, current, current_tokens, carried = [], [], 0, 0
+    i = 0
+    while i < len(units) or len(current) > carried:
+        done = i == len(units)
+        if done or (len(current) > carried and current_tokens + units[i][1] > chunk_tokens):
+            current, sent_back = _fit(current, carried, chunk_tokens)
+            chunks.append(" ".join(u for u, _ in current))
+            i -= sent_back
+            if i == len(units):
+                break
+            # Carry the tail of the previous chunk over so ideas split across the
+            # boundary are seen whole at least once, as far as the next unit leaves room
+            overlap, overlap_total = [], 0
+            for prev in reversed(current):
+                if overlap_total + prev[1] > min(overlap_tokens, chunk_tokens - units[i][1]):
+                    break
+                overlap.insert(0, prev)
+                overlap_total += prev[1]
+            current, current_tokens, carried = overlap, overlap_total, len(overlap)
+        current.append(units[i])
+        current_tokens += units[i][1]
+        i += 1
+    return chunks
+
+# =============================
+# COMPLETION
+# =============================
+
+def _record_tokens(model, usage, prompt, output):
+    # Prefer the API's own usage numbers; fall back to counting locally
+    tokens_in = getattr(usage, "prompt_tokens", None) or count_tokens(prompt, model)
+    tokens_out = getattr(usage, "completion_tokens", None) or count_tokens(output, model)
+    metrics.inc("summary_tokens_in_total", tokens_in, model=model)
+    metrics.inc("summary_tokens_out_total", tokens_out, model=model)
+
+def complete(client, prompt, model=SUMMARY_MODEL, temperature=TEMPERATURE):
+    with metrics.timer("summary_request_seconds", model=model, stream=False):
+        response = client.chat.completions.create(
+            model=model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=temperature
+        )
+    content = response.choices[0].message.content.strip()
+    _record_tokens(model, getattr(response, "usage", None), prompt, content)
+    return content
+
+def stream_complete(client, prompt, model=SUMMARY_MODEL, temperature=TEMPERATURE):
+    """Yields content deltas as the API streams them back."""
+    start = time.perf_counter()
+    stream = client.chat.completions.create(
+        model=model,
+        messages=[{"role": "user", "content": prompt}],
+        temperature=temperature,
+        stream=True,
+        stream_options={"include_usage": True}
+    )
+    output, usage, first_token = [], None, None
+    for chunk in stream:
+        usage = getattr(chunk, "usage", None) or usage
+        if not chunk.choices:
+            continue
+        delta = chunk.choices[0].delta.content
+        if delta:
+            if first_token is None:
+                first_token = time.perf_counter() - start
+                metrics.observe("summary_time_to_first_token_seconds", first_token, model=model)
+            output.append(delta)
+            yield delta
+    metrics.observe("summary_request_seconds", time.perf_counter() - start, model=model, stream=True, outcome="ok")
+    _record_tokens(model, usage, prompt, "".join(output))
+
+def map_chunks(client, chunks, max_workers=MAX_WORKERS, model=SUMMARY_MODEL):
+    total = len(chunks)
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = [
+            pool.submit(complete, client, build_map_prompt(chunk, i + 1, total), model, 0.3)
+            for i, chunk in enumerate(chunks)
+        ]
+        return [f.result() for f in futures]
+
+def reduce_notes(client, notes, chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+                 max_workers=MAX_WORKERS, model=SUMMARY_MODEL):
+    """Collapses partial notes until they fit one prompt."""
+    combined = "\n\n".join(f"Part {i + 1} notes:\n{n}" for i, n in enumerate(notes))
+    while count_tokens(combined) > chunk_tokens and len(notes) > 1:
+        chunks = chunk_transcript(combined, chunk_tokens=chunk_tokens, overlap_tokens=0)
+        if len(chunks) >= len(notes):  # notes are not getting any shorter
+            break
+        notes = map_chunks(client, chunks, max_workers, model)
+        combined = "\n\n".join(f"Part {i + 1} notes:\n{n}" for i, n in enumerate(notes))
+    return combined
+
+def prepare_text(client, text, segments=None, chunk_tokens=CHUNK_TOKENS,
+                 overlap_tokens=CHUNK_OVERLAP_TOKENS, max_workers=MAX_WORKERS,
+                 threshold_tokens=MAP_REDUCE_THRESHOLD_TOKENS, model=SUMMARY_MODEL):
+    """Returns text small enough for the final prompt, running the map step when needed."""
+    if count_tokens(text) <= threshold_tokens:
+        return text
+    chunks = chunk_transcript(text, segments, chunk_tokens, overlap_tokens)
+    notes = map_chunks(client, chunks, max_workers, model)
+    return reduce_notes(client, notes, chunk_tokens, overlap_tokens, max_workers, model)
+
+def summarize(client, text, summary_type="Paragraph", language="English", segments=None,
+              chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+              max_workers=MAX_WORKERS, threshold_tokens=MAP_REDUCE_THRESHOLD_TOKENS,
+              model=SUMMARY_MODEL):
+    source = prepare_text(client, text, segments, chunk_tokens, overlap_tokens,
+                          max_workers, threshold_tokens, model)
+    return complete(client, build_prompt(source, summary_type, language), model)
+
+def summarize_stream(client, text, summary_type="Paragraph", language="English", segments=None,
+                     chunk_tokens=CHUNK_TOKENS, overlap_tokens=CHUNK_OVERLAP_TOKENS,
+                     max_workers=MAX_WORKERS, threshold_tokens=MAP_REDUCE_THRESHOLD_TOKENS,
+                     model=SUMMARY_MODEL):
+    # The map phase (if any) has to finish first; only the final prompt is streamed
+    source = prepare_text(client, text, segments, chunk_tokens, overlap_tokens,
+                          max_workers, threshold_tokens, model)
+    yield from stream_complete(client, build_prompt(source, summary_type, language), model)
+
+def translate_stream(client, summary, summary_type, language, model=SUMMARY_MODEL):
+    yield from stream_complete(client, build_translate_prompt(summary, summary_type, language), model, 0.3)
+
+# =============================
+# MULTI-FORMAT / MULTI-LANGUAGE FAN-OUT
+# =============================
+
+def fan_out(client, text, summary_types, languages, segments=None, max_workers=MAX_WORKERS,
+            model=SUMMARY_MODEL, report=None):
+    """Yields (summary_type, language, summary) for every combination as each one finishes.
+
+    The transcript is condensed once into an English digest; every format/language
+    rendering is then produced from the digest, so the transcript is only sent once.
+    """
+    combos = [(t, l) for t in summary_types for l in languages]
+    transcript_tokens = count_tokens(text)
+    source = prepare_text(client, text, segments, max_workers=max_workers, model=model)
+    digest = complete(client, build_digest_prompt(source), model, 0.3)
+    if report is not None:
+        report.update({
+            "combinations": len(combos),
+            "transcript_tokens": transcript_tokens,
+            "naive_transcript_tokens": transcript_tokens * len(combos),
+            "sent_transcript_tokens": transcript_tokens if source is text else transcript_tokens + count_tokens(source),
+            "digest_tokens": count_tokens(digest),
+        })
+    with ThreadPoolExecutor(max_workers=max(1, max_workers)) as pool:
+        futures = {
+            pool.submit(complete, client, build_prompt(digest, t, l), model): (t, l)
+            for t, l in combos
+        }
+        for future in as_completed(futures):
+            summary_type, language = futures[future]
+            yield summary_type, language, future.result()
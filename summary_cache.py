@@ -0,0 +1,168 @@
+# Summary result cache + request coalescing
+# Summaries are cached on disk per (transcript hash, summary type, language, model,
+# prompt version) with TTL and LRU eviction. Identical requests that arrive while the
+# first one is still running wait for it instead of calling the API again.
+# Entries made by translating another cached summary record the language they came
+# from, so a language switch translates an original, not a translation of one.
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+from concurrent.futures import Future
+
+# =============================
+# CONFIGURATION
+# =============================
+
+CACHE_DIR = os.path.join("cache", "summaries")
+CACHE_TTL_SECONDS = 30 * 24 * 60 * 60
+CACHE_MAX_ENTRIES = 5000
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+# =============================
+# KEYS
+# =============================
+
+def transcript_hash(text):
+    return hashlib.sha256(text.strip().encode("utf-8")).hexdigest()[:32]
+
+def _slug(value):
+    return re.sub(r"[^A-Za-z0-9.-]+", "-", str(value)).strip("-").lower()
+
+def make_key(text, summary_type, language, model, prompt_version):
+    # Readable file names, so every language cached for a transcript can be found by prefix
+    return "_".join([
+        transcript_hash(text), _slug(summary_type), _slug(model), f"v{prompt_version}", _slug(language),
+    ])
+
+def _path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+# =============================
+# READ / WRITE
+# =============================
+
+def _read(key):
+    path = _path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if time.time() - entry.get("created", 0) > CACHE_TTL_SECONDS:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+        return None
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return entry
+
+def get(key):
+    entry = _read(key)
+    return entry["summary"] if entry is not None else None
+
+def put(key, summary, translated_from=None):
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = _path(key)
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    entry = {"summary": summary, "created": time.time()}
+    if translated_from:
+        entry["translated_from"] = translated_from
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(entry, f, ensure_ascii=False)
+    os.replace(tmp_path, path)
+    evict()
+
+def find_other_language(text, summary_type, model, prompt_version):
+    """Returns (language, summary) of a cached summary of the same transcript and format,
+    preferring one generated from the transcript over one that is itself a translation."""
+    if not os.path.isdir(CACHE_DIR):
+        return None
+    prefix = "_".join([transcript_hash(text), _slug(summary_type), _slug(model), f"v{prompt_version}"]) + "_"
+    translated = None
+    for name in os.listdir(CACHE_DIR):
+        if name.startswith(prefix) and name.endswith(".json"):
+            key = name[:-len(".json")]
+            entry = _read(key)
+            if entry is None:
+                continue
+            if not entry.get("translated_from"):
+                return key[len(prefix):], entry["summary"]
+            translated = translated or (key[len(prefix):], entry["summary"])
+    return translated
+
+def evict(max_entries=CACHE_MAX_ENTRIES, ttl_seconds=CACHE_TTL_SECONDS):
+    if not os.path.isdir(CACHE_DIR):
+        return
+    now = time.time()
+    files = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        path = os.path.join(CACHE_DIR, name)
+        try:
+            mtime = os.path.getmtime(path)
+        except OSError:
+            continue
+        files.append((mtime, path))
+    files.sort()
+    excess = len(files) - max_entries
+    for i, (mtime, path) in enumerate(files):
+        # Least recently used first; anything untouched past the TTL goes too
+        if i < excess or now - mtime > ttl_seconds:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+# =============================
+# REQUEST COALESCING
+# =============================
+
+def begin(key):
+    """Returns (True, future) for the caller that must compute the summary,
+    or (False, future) for callers that should wait on the one already running."""
+    with _inflight_lock:
+        future = _inflight.get(key)
+        if future is not None:
+            return False, future
+        future = Future()
+        _inflight[key] = future
+        return True, future
+
+def finish(key, summary, translated_from=None):
+    put(key, summary, translated_from)
+    with _inflight_lock:
+        future = _inflight.pop(key, None)
+    if future is not None:
+        future.set_result(summary)
+
+def fail(key, error):
+    with _inflight_lock:
+        future = _inflight.pop(key, None)
+    if future is not None:
+        future.set_exception(error)
+
+def get_or_compute(key, compute):
+    summary = get(key)
+    if summary is not None:
+        return summary
+    leader, future = begin(key)
+    if not leader:
+        return future.result()
+    try:
+        summary = compute()
+    except Exception as e:
+        fail(key, e)
+        raise
+    finish(key, summary)
+    return summary
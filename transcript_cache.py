@@ -0,0 +1,142 @@
+# Persistent transcript cache
+# Entries are keyed by the canonical YouTube video ID plus the Whisper settings that
+# produced them, so a repeat request for the same video skips download and transcription.
+# Each entry is a small JSON metadata file plus a .ytt file holding the timestamped
+# segments (see transcript_format), which is memory-mapped on read.
+
+import os
+import re
+import json
+import time
+import hashlib
+import threading
+
+from transcript_format import Transcript
+
+# =============================
+# CONFIGURATION
+# =============================
+
+CACHE_DIR = os.path.join("cache", "transcripts")
+CACHE_MAX_BYTES = 500 * 1024 * 1024  # LRU eviction kicks in above 500 MB
+
+_write_lock = threading.Lock()
+
+_VIDEO_ID_PATTERNS = [
+    r"(?:v=|/v/)([A-Za-z0-9_-]{11})",
+    r"youtu\.be/([A-Za-z0-9_-]{11})",
+    r"/(?:shorts|embed|live)/([A-Za-z0-9_-]{11})",
+]
+
+# =============================
+# KEYS + FINGERPRINTS
+# =============================
+
+def extract_video_id(video_url):
+    for pattern in _VIDEO_ID_PATTERNS:
+        match = re.search(pattern, video_url or "")
+        if match:
+            return match.group(1)
+    # Not a recognisable YouTube link: fall back to the URL without tracking params
+    return hashlib.sha256((video_url or "").split("?")[0].strip().encode("utf-8")).hexdigest()[:16]
+
+def cache_key(video_url, model, language=None, options=None):
+    payload = {
+        "video_id": extract_video_id(video_url),
+        "model": model,
+        "language": language,
+        "options": options or {},
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode("utf-8")).hexdigest()
+
+def audio_fingerprint(audio_file, block_size=1024 * 1024):
+    digest = hashlib.sha256()
+    with open(audio_file, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+def _entry_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.json")
+
+def _segments_path(key):
+    return os.path.join(CACHE_DIR, f"{key}.ytt")
+
+# =============================
+# READ / WRITE
+# =============================
+
+def get(video_url, model, language=None, options=None):
+    key = cache_key(video_url, model, language, options)
+    path = _entry_path(key)
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            entry = json.load(f)
+        if os.path.exists(_segments_path(key)):
+            entry["segments"] = Transcript.load(_segments_path(key))
+        else:
+            # Entries written before the .ytt format kept their segments inline
+            entry["segments"] = Transcript.from_segments(entry.get("segments"), entry.get("language"))
+    except (OSError, ValueError):
+        return None
+    # Bump mtime so eviction treats this entry as recently used
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+    return entry
+
+def put(video_url, model, text, segments=None, audio_file=None, language=None, options=None):
+    key = cache_key(video_url, model, language, options)
+    entry = {
+        "video_id": extract_video_id(video_url),
+        "video_url": video_url,
+        "model": model,
+        "language": language,
+        "options": options or {},
+        "text": text,
+        "audio_sha256": audio_fingerprint(audio_file) if audio_file and os.path.exists(audio_file) else None,
+        "created": time.strftime("%Y-%m-%d %H:%M:%S"),
+    }
+    transcript = segments if isinstance(segments, Transcript) else Transcript.from_segments(segments, language)
+    with _write_lock:
+        os.makedirs(CACHE_DIR, exist_ok=True)
+        # Segments first: a metadata file is only ever visible next to its .ytt
+        transcript.save(_segments_path(key))
+        path = _entry_path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        evict(CACHE_MAX_BYTES)
+    entry["segments"] = transcript
+    return entry
+
+def evict(max_bytes=CACHE_MAX_BYTES):
+    if not os.path.isdir(CACHE_DIR):
+        return []
+    entries = []
+    for name in os.listdir(CACHE_DIR):
+        if not name.endswith(".json"):
+            continue
+        key = name[:-len(".json")]
+        try:
+            info = os.stat(_entry_path(key))
+            size = info.st_size + (os.path.getsize(_segments_path(key)) if os.path.exists(_segments_path(key)) else 0)
+        except OSError:
+            continue
+        entries.append((info.st_mtime, size, key))
+    total = sum(size for _, size, _ in entries)
+    removed = []
+    for _, size, key in sorted(entries):  # oldest access first
+        if total <= max_bytes:
+            break
+        try:
+            os.remove(_entry_path(key))
+            if os.path.exists(_segments_path(key)):
+                os.remove(_segments_path(key))
+        except OSError:
+            continue
+        total -= size
+        removed.append(_entry_path(key))
+    return removed
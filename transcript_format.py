@@ -0,0 +1,233 @@
+# Compact, indexed transcript format
+# Whisper's segments (and word timings, when decoded with word_timestamps) kept as
+# columns: float32 start/end arrays plus one UTF-8 blob with an offsets array, instead
+# of a list of dicts. A time range maps to a segment slice with a binary search, and the
+# .ytt file holds the same columns raw, so long transcripts load with np.memmap in
+# constant time and only the pages that are actually read come off disk.
+#
+# .ytt layout: b"YTT1" | uint32 header length | JSON header | 8-byte aligned columns.
+# The header maps every column name to [dtype, byte offset, item count].
+
+import os
+import json
+import struct
+
+import numpy as np
+
+# =============================
+# CONFIGURATION
+# =============================
+
+MAGIC = b"YTT1"
+ALIGN = 8
+
+_SEGMENT_COLUMNS = ["seg_start", "seg_end", "seg_text_offsets", "seg_text"]
+_WORD_COLUMNS = ["word_start", "word_end", "word_segment", "word_text_offsets", "word_text"]
+
+def _pack_texts(texts):
+    encoded = [t.encode("utf-8") for t in texts]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.uint32)
+    np.cumsum([len(e) for e in encoded], out=offsets[1:])
+    return offsets, np.frombuffer(b"".join(encoded), dtype=np.uint8)
+
+# =============================
+# TRANSCRIPT
+# =============================
+
+class Transcript:
+    """Segments as parallel arrays. Iterating (or indexing) yields {"start", "end", "text"}
+    dicts, so a Transcript can be passed anywhere a Whisper segment list is expected."""
+
+    def __init__(self, columns, language=None):
+        self.columns = columns
+        self.language = language
+
+    @classmethod
+    def from_segments(cls, segments, language=None):
+        segments = list(segments or [])
+        offsets, blob = _pack_texts([s["text"] for s in segments])
+        columns = {
+            "seg_start": np.array([s["start"] for s in segments], dtype=np.float32),
+            "seg_end": np.array([s["end"] for s in segments], dtype=np.float32),
+            "seg_text_offsets": offsets,
+            "seg_text": blob,
+        }
+        words = [(i, w) for i, s in enumerate(segments) for w in (s.get("words") or [])]
+        if words:
+            word_offsets, word_blob = _pack_texts([w["word"] for _, w in words])
+            columns.update({
+                "word_start": np.array([w["start"] for _, w in words], dtype=np.float32),
+                "word_end": np.array([w["end"] for _, w in words], dtype=np.float32),
+                "word_segment": np.array([i for i, _ in words], dtype=np.uint32),
+                "word_text_offsets": word_offsets,
+                "word_text": word_blob,
+            })
+        return cls(columns, language)
+
+    # -- sequence protocol -------------------------------------------------
+
+    def __len__(self):
+        return len(self.columns["seg_start"])
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return self.slice(*i.indices(len(self))[:2])
+        if i < 0:
+            i += len(self)
+        return {
+            "start": float(self.columns["seg_start"][i]),
+            "end": float(self.columns["seg_end"][i]),
+            "text": self._text("seg", i),
+        }
+
+    def _text(self, prefix, i):
+        offsets = self.columns[f"{prefix}_text_offsets"]
+        return self.columns[f"{prefix}_text"][offsets[i]:offsets[i + 1]].tobytes().decode("utf-8")
+
+    @property
+    def has_words(self):
+        return "word_start" in self.columns
+
+    @property
+    def duration(self):
+        return float(self.columns["seg_end"][-1]) if len(self) else 0.0
+
+    # -- random access -----------------------------------------------------
+
+    def index_at(self, seconds):
+        """Index of the segment playing at `seconds` (the last one starting at or before it)."""
+        return max(0, int(np.searchsorted(self.columns["seg_start"], seconds, side="right")) - 1)
+
+    def slice(self, first, last):
+        """Segments [first, last) as a Transcript sharing (not copying) these columns."""
+        offsets = self.columns["seg_text_offsets"]
+        columns = {
+            "seg_start": self.columns["seg_start"][first:last],
+            "seg_end": self.columns["seg_end"][first:last],
+            "seg_text_offsets": offsets[first:last + 1] - offsets[first],
+            "seg_text": self.columns["seg_text"][offsets[first]:offsets[max(first, last)]],
+        }
+        if self.has_words:
+            segment_of = self.columns["word_segment"]
+            lo, hi = np.searchsorted(segment_of, [first, last])
+            word_offsets = self.columns["word_text_offsets"]
+            columns.update({
+                "word_start": self.columns["word_start"][lo:hi],
+                "word_end": self.columns["word_end"][lo:hi],
+                "word_segment": segment_of[lo:hi] - first,
+                "word_text_offsets": word_offsets[lo:hi + 1] - word_offsets[lo],
+                "word_text": self.columns["word_text"][word_offsets[lo]:word_offsets[max(lo, hi)]],
+            })
+        return Transcript(columns, self.language)
+
+    def between(self, start, end):
+        """Segments overlapping [start, end) seconds."""
+        first = int(np.searchsorted(self.columns["seg_end"], start, side="right"))
+        last = int(np.searchsorted(self.columns["seg_start"], end, side="left"))
+        return self.slice(first, max(first, last))
+
+    def words(self):
+        """Word timings as (start, end, word) tuples."""
+        if not self.has_words:
+            return []
+        return [
+            (float(s), float(e), self._text("word", i))
+            for i, (s, e) in enumerate(zip(self.columns["word_start"], self.columns["word_end"]))
+        ]
+
+    @property
+    def text(self):
+        return self.columns["seg_text"].tobytes().decode("utf-8")
+
+    def to_segments(self):
+        return list(self)
+
+    # -- serialization -----------------------------------------------------
+
+    def save(self, path):
+        names = _SEGMENT_COLUMNS + (_WORD_COLUMNS if self.has_words else [])
+        layout, position = {}, 0
+        for name in names:
+            array = np.ascontiguousarray(self.columns[name])
+            layout[name] = [array.dtype.str, position, len(array)]
+            position += -(-array.nbytes // ALIGN) * ALIGN
+        header = json.dumps({"language": self.language, "columns": layout}).encode("utf-8")
+        header += b" " * (-(len(MAGIC) + 4 + len(header)) % ALIGN)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(MAGIC + struct.pack("<I", len(header)) + header)
+            for name in names:
+                data = np.ascontiguousarray(self.columns[name]).tobytes()
+                f.write(data + b"\0" * (-len(data) % ALIGN))
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        with open(path, "rb") as f:
+            if f.read(len(MAGIC)) != MAGIC:
+                raise ValueError(f"{path} is not a transcript file")
+            (header_len,) = struct.unpack("<I", f.read(4))
+            header = json.loads(f.read(header_len))
+            base = len(MAGIC) + 4 + header_len
+            raw = None if mmap else np.frombuffer(f.read(), dtype=np.uint8)
+        if mmap:
+            raw = np.memmap(path, dtype=np.uint8, mode="r", offset=base)
+        columns = {}
+        for name, (dtype, offset, count) in header["columns"].items():
+            dtype = np.dtype(dtype)
+            columns[name] = raw[offset:offset + count * dtype.itemsize].view(dtype)
+        return cls(columns, header.get("language"))
+
+    def __repr__(self):
+        return f"Transcript({len(self)} segments, {self.duration:.1f}s, words={self.has_words})"
+
+def format_timestamp(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    return f"{hours}:{rest // 60:02d}:{rest % 60:02d}" if hours else f"{rest // 60}:{rest % 60:02d}"
+
+# =============================
+# BENCHMARK
+# =============================
+
+def benchmark(segments=50_000, path="transcript_bench.ytt"):
+    import time
+    rng = np.random.default_rng(0)
+    starts = np.cumsum(rng.uniform(1, 6, segments))
+    source = [
+        {"start": float(s), "end": float(s + 1), "text": f" segment {i} with some spoken words in it."}
+        for i, s in enumerate(starts)
+    ]
+    transcript = Transcript.from_segments(source)
+    transcript.save(path)
+    with open("transcript_bench.json", "w", encoding="utf-8") as f:
+        json.dump(source, f)
+
+    def timed(fn, repeat=20):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            fn()
+        return (time.perf_counter() - start) / repeat * 1000
+
+    loaded = Transcript.load(path)
+    middle = float(starts[segments // 2])
+    results = {
+        "segments": segments,
+        "json_bytes": os.path.getsize("transcript_bench.json"),
+        "ytt_bytes": os.path.getsize(path),
+        "json_load_ms": timed(lambda: json.load(open("transcript_bench.json", encoding="utf-8"))),
+        "ytt_mmap_load_ms": timed(lambda: Transcript.load(path)),
+        "range_query_ms": timed(lambda: loaded.between(middle, middle + 300).text, repeat=1000),
+    }
+    del loaded
+    os.remove(path)
+    os.remove("transcript_bench.json")
+    return results
+
+if __name__ == "__main__":
+    for name, value in benchmark().items():
+        print(f"{name:>18}: {value:.3f}" if isinstance(value, float) else f"{name:>18}: {value}")
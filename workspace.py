@@ -0,0 +1,69 @@
+# Per-session working directories
+# Every session (or background job) gets its own temp directory for audio and
+# transcript files, so concurrent users never read or overwrite each other's files.
+
+import os
+import time
+import shutil
+import tempfile
+
+# =============================
+# CONFIGURATION
+# =============================
+
+WORKSPACE_ROOT = os.path.join(tempfile.gettempdir(), "yt_summarizer")
+WORKSPACE_MAX_AGE_SECONDS = 6 * 60 * 60  # untouched workspaces are removed after 6 hours
+WORKSPACE_QUOTA_BYTES = 2 * 1024 * 1024 * 1024  # per-workspace disk quota
+
+# =============================
+# LIFECYCLE
+# =============================
+
+def create_workspace(job_id=None):
+    os.makedirs(WORKSPACE_ROOT, exist_ok=True)
+    cleanup_stale_workspaces()
+    prefix = f"{job_id}_" if job_id else "session_"
+    return tempfile.mkdtemp(prefix=prefix, dir=WORKSPACE_ROOT)
+
+def touch_workspace(path):
+    try:
+        os.utime(path, None)
+    except OSError:
+        pass
+
+def remove_workspace(path):
+    # Only ever delete directories we created under WORKSPACE_ROOT
+    if os.path.dirname(os.path.abspath(path)) == os.path.abspath(WORKSPACE_ROOT):
+        shutil.rmtree(path, ignore_errors=True)
+
+def cleanup_stale_workspaces(max_age_seconds=WORKSPACE_MAX_AGE_SECONDS):
+    if not os.path.isdir(WORKSPACE_ROOT):
+        return []
+    now = time.time()
+    removed = []
+    for name in os.listdir(WORKSPACE_ROOT):
+        path = os.path.join(WORKSPACE_ROOT, name)
+        try:
+            if os.path.isdir(path) and now - os.path.getmtime(path) > max_age_seconds:
+                remove_workspace(path)
+                removed.append(path)
+        except OSError:
+            continue
+    return removed
+
+# =============================
+# DISK QUOTA
+# =============================
+
+def workspace_size(path):
+    total = 0
+    for root, _, files in os.walk(path):
+        for name in files:
+            try:
+                total += os.path.getsize(os.path.join(root, name))
+            except OSError:
+                continue
+    return total
+
+def within_quota(path, quota_bytes=WORKSPACE_QUOTA_BYTES):
+    return workspace_size(path) <= quota_bytes